@@ -0,0 +1,90 @@
+"""
+Benchmark do pós-processamento: serial (uma thread) x pool de processos por número de núcleos.
+
+Gera um lote sintético (Document com N tokens + imagem de página) e mede o tempo para
+produzir .txt, .json e PNG anotado de todos os itens:
+
+    python bench_postprocess.py --jobs 48 --tokens 400 --size 2480x3508 --workers 1,2,4,8
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+from google.cloud import documentai_v1 as documentai
+
+from fake_docai import synthetic_document
+from postprocess import PostProcessor, postprocess
+
+
+def make_page(path: str, size: tuple[int, int], seed: int) -> None:
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(200):
+        points = [(rng.randrange(size[0]), rng.randrange(size[1])) for _ in range(2)]
+        draw.line(points, fill="black", width=rng.randint(2, 5))
+    image.save(path, format="PNG")
+
+
+def run_serial(document_bytes: bytes, images: list[str], out_dir: str) -> float:
+    start = time.perf_counter()
+    for i, image_path in enumerate(images):
+        postprocess(document_bytes, os.path.join(out_dir, f"serial-{i}"), image_path)
+    return time.perf_counter() - start
+
+
+def run_pool(document, images: list[str], out_dir: str, workers: int) -> float:
+    with PostProcessor(max_workers=workers) as pool:
+        # Sobe os workers (spawn + imports) fora da medição
+        for future in [pool.submit(document, os.path.join(out_dir, f"warm-{w}"), annotate=False) for w in range(workers)]:
+            future.result()
+        start = time.perf_counter()
+        futures = [
+            pool.submit(document, os.path.join(out_dir, f"pool{workers}-{i}"), image_path)
+            for i, image_path in enumerate(images)
+        ]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - start
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark do pós-processamento em pool de processos")
+    parser.add_argument("--jobs", type=int, default=24, help="Itens no lote")
+    parser.add_argument("--tokens", type=int, default=400, help="Tokens por Document")
+    parser.add_argument("--size", default="2480x3508", help="Tamanho da página (A4 a 300 dpi por padrão)")
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= cores),
+                        help="Números de processos a testar")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    levels = [int(n) for n in args.workers.split(",") if n.strip()]
+    work_dir = tempfile.mkdtemp(prefix="bench-postprocess-")
+    try:
+        images = []
+        for i in range(min(args.jobs, 8)):  # poucas imagens distintas, reaproveitadas no lote
+            path = os.path.join(work_dir, f"page-{i}.png")
+            make_page(path, (width, height), i)
+            images.append(path)
+        images = [images[i % len(images)] for i in range(args.jobs)]
+        document = synthetic_document(args.tokens)
+        document_bytes = documentai.Document.serialize(document)
+
+        print(f"🧪 {args.jobs} itens | {args.tokens} tokens | página {width}x{height} | {cores} núcleo(s)")
+        serial = run_serial(document_bytes, images, work_dir)
+        print(f"{'modo':>10} {'tempo':>8} {'itens/s':>8} {'speedup':>8}")
+        print(f"{'serial':>10} {serial:>7.2f}s {args.jobs / serial:>8.2f} {1.0:>7.2f}x")
+        for workers in levels:
+            elapsed = run_pool(document, images, work_dir, workers)
+            print(f"{f'{workers} proc':>10} {elapsed:>7.2f}s {args.jobs / elapsed:>8.2f} {serial / elapsed:>7.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Estatísticas do Document numa única passada, em arrays colunares (numpy).
+
+token_table() percorre uma vez os tokens de todas as páginas — direto no protobuf,
+sem os wrappers proto-plus — e monta colunas: página, confiança, caracteres, área e
+caixa normalizada. Daí saem, vetorizados:
+- contagens de tokens/palavras/caracteres (total e por página)
+- histogramas de confiança (total e por página)
+- regiões de baixa confiança: células de uma grade por página com confiança média baixa
+- o mapa de calor de confiança sobreposto à imagem
+"""
+import numpy as np
+from PIL import Image, ImageDraw
+
+CONFIDENCE_BINS = np.linspace(0.0, 1.0, 11)  # 10 faixas de 0.1
+LOW_CONFIDENCE = 0.5
+REGION_GRID = 8  # células por lado na busca de regiões de baixa confiança
+
+
+def token_table(document) -> dict[str, np.ndarray]:
+    """Colunas por token: page, confidence, chars, x0, y0, x1, y1 (normalizados; NaN sem caixa) e area."""
+    pb = type(document).pb(document)
+    text = pb.text
+    pages, confidences, chars, coords = [], [], [], []
+    nan_box = (np.nan,) * 4
+
+    # Laço mínimo no protobuf (acesso a campo é o custo dominante); min/max em numpy depois
+    for page_index, page in enumerate(pb.pages):
+        width = page.dimension.width or 1.0
+        height = page.dimension.height or 1.0
+        for token in page.tokens:
+            layout = token.layout
+            pages.append(page_index)
+            confidences.append(layout.confidence)
+            count = 0
+            for segment in layout.text_anchor.text_segments:
+                count += len(text[segment.start_index:segment.end_index].strip())
+            chars.append(count)
+
+            poly = layout.bounding_poly
+            vertices = poly.normalized_vertices
+            if len(vertices) == 4:
+                a, b, c, d = vertices
+                coords.append((a.x, b.x, c.x, d.x, a.y, b.y, c.y, d.y))
+                continue
+            if vertices:
+                xs, ys = [v.x for v in vertices], [v.y for v in vertices]
+            elif poly.vertices:
+                xs, ys = [v.x / width for v in poly.vertices], [v.y / height for v in poly.vertices]
+            else:
+                coords.append(nan_box * 2)
+                continue
+            coords.append((min(xs),) * 2 + (max(xs),) * 2 + (min(ys),) * 2 + (max(ys),) * 2)
+
+    quads = np.array(coords, dtype=np.float32).reshape(-1, 2, 4)
+    box_array = np.stack([quads[:, 0].min(axis=1), quads[:, 1].min(axis=1),
+                          quads[:, 0].max(axis=1), quads[:, 1].max(axis=1)], axis=1)
+    x0, y0, x1, y1 = box_array.T
+    return {
+        "page": np.array(pages, dtype=np.int32),
+        "confidence": np.array(confidences, dtype=np.float32),
+        "chars": np.array(chars, dtype=np.int32),
+        "x0": x0, "y0": y0, "x1": x1, "y1": y1,
+        "area": (x1 - x0) * (y1 - y0),
+    }
+
+
+def _low_confidence_regions(table: dict, num_pages: int, threshold: float, grid: int) -> list[dict]:
+    has_box = ~np.isnan(table["x0"])
+    page = table["page"][has_box]
+    confidence = table["confidence"][has_box]
+    center_x = (table["x0"][has_box] + table["x1"][has_box]) / 2
+    center_y = (table["y0"][has_box] + table["y1"][has_box]) / 2
+
+    col = np.clip((center_x * grid).astype(np.int64), 0, grid - 1)
+    row = np.clip((center_y * grid).astype(np.int64), 0, grid - 1)
+    cell = (page.astype(np.int64) * grid + row) * grid + col
+    size = num_pages * grid * grid
+    counts = np.bincount(cell, minlength=size)
+    sums = np.bincount(cell, weights=confidence, minlength=size)
+    lows = np.bincount(cell, weights=confidence < threshold, minlength=size)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    regions = []
+    for index in np.flatnonzero((counts > 0) & (means < threshold)):
+        page_index, rest = divmod(int(index), grid * grid)
+        cell_row, cell_col = divmod(rest, grid)
+        regions.append({
+            "page": page_index + 1,
+            "box": [cell_col / grid, cell_row / grid, (cell_col + 1) / grid, (cell_row + 1) / grid],
+            "tokens": int(counts[index]),
+            "low_confidence_tokens": int(lows[index]),
+            "mean_confidence": round(float(means[index]), 3),
+        })
+    regions.sort(key=lambda r: r["mean_confidence"])
+    return regions
+
+
+def summarize(document, table: dict | None = None, low_threshold: float = LOW_CONFIDENCE,
+              grid: int = REGION_GRID) -> dict:
+    """Contagens, histogramas e regiões de baixa confiança de todas as páginas."""
+    table = token_table(document) if table is None else table
+    num_pages = max(len(document.pages), 1)
+    page = table["page"]
+    confidence = table["confidence"]
+    chars = table["chars"]
+    is_word = chars > 0
+
+    if len(page):
+        words, total_chars = int(np.count_nonzero(is_word)), int(chars.sum())
+    else:
+        # Sem tokens (ex.: field mask sem pages.tokens): contagem pelo texto
+        text = document.text or ""
+        words, total_chars = len(text.split()), sum(not c.isspace() for c in text)
+
+    tokens_per_page = np.bincount(page, minlength=num_pages)
+    words_per_page = np.bincount(page, weights=is_word, minlength=num_pages).astype(np.int64)
+    chars_per_page = np.bincount(page, weights=chars, minlength=num_pages).astype(np.int64)
+    low_per_page = np.bincount(page, weights=confidence < low_threshold, minlength=num_pages).astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_per_page = np.bincount(page, weights=confidence, minlength=num_pages) / tokens_per_page
+
+    histogram_per_page, _, _ = np.histogram2d(
+        page, np.clip(confidence, 0.0, 1.0), bins=[np.arange(num_pages + 1), CONFIDENCE_BINS]
+    )
+
+    return {
+        "pages": len(document.pages),
+        "tokens": int(len(page)),
+        "words": words,
+        "chars": total_chars,
+        "confidence": {
+            "mean": round(float(confidence.mean()), 3) if len(confidence) else None,
+            "median": round(float(np.median(confidence)), 3) if len(confidence) else None,
+            "p10": round(float(np.percentile(confidence, 10)), 3) if len(confidence) else None,
+            "min": round(float(confidence.min()), 3) if len(confidence) else None,
+            "low_threshold": low_threshold,
+            "low_tokens": int(np.count_nonzero(confidence < low_threshold)),
+        },
+        "histogram": {
+            "bins": [round(float(b), 2) for b in CONFIDENCE_BINS],
+            "counts": histogram_per_page.sum(axis=0).astype(int).tolist(),
+        },
+        "per_page": [
+            {
+                "page": i + 1,
+                "tokens": int(tokens_per_page[i]),
+                "words": int(words_per_page[i]),
+                "chars": int(chars_per_page[i]),
+                "mean_confidence": None if tokens_per_page[i] == 0 else round(float(mean_per_page[i]), 3),
+                "low_confidence_tokens": int(low_per_page[i]),
+                "histogram": histogram_per_page[i].astype(int).tolist(),
+            }
+            for i in range(num_pages)
+        ],
+        "low_confidence_regions": _low_confidence_regions(table, num_pages, low_threshold, grid),
+    }
+
+
+def confidence_heatmap(image: Image.Image, table: dict, page: int = 0, alpha: int = 110) -> Image.Image:
+    """Sobrepõe à imagem os tokens da página coloridos pela confiança (vermelho = baixa, verde = alta)."""
+    selected = (table["page"] == page) & ~np.isnan(table["x0"])
+    width, height = image.size
+    confidence = np.clip(table["confidence"][selected], 0.0, 1.0)
+    boxes = np.stack([
+        table["x0"][selected] * width, table["y0"][selected] * height,
+        table["x1"][selected] * width, table["y1"][selected] * height,
+    ], axis=1)
+    red = ((1.0 - confidence) * 255).astype(np.uint8)
+    green = (confidence * 255).astype(np.uint8)
+
+    overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for box, r, g in zip(boxes.tolist(), red.tolist(), green.tolist()):
+        draw.rectangle(box, fill=(r, g, 0, alpha))
+    return Image.alpha_composite(image.convert("RGBA"), overlay).convert("RGB")
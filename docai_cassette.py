@@ -0,0 +1,140 @@
+"""
+Gravação e reprodução (record/replay) das respostas do Document AI.
+
+Permite perfilar parse/renderização e rodar benchmarks de regressão com respostas
+reais, de forma determinística, sem rede e sem consumir cota:
+- record: repassa ao client real e grava cada resposta, indexada pela impressão
+  digital (SHA-256) do ProcessRequest serializado, junto com a latência observada
+- replay: serve as respostas gravadas pela mesma interface do client
+  (process_document / get_processor), opcionalmente dormindo a latência original
+
+Layout do cassete (diretório):
+    <sha256>.pb    ProcessResponse serializado
+    <sha256>.json  metadados (latência, processador, MIME, bytes, data da gravação)
+
+Configuração no app ([google] do secrets.toml): docai_mode = "live" | "record" | "replay",
+cassette_dir e replay_latency. No daemon: --docai-mode, --cassette-dir, --replay-latency.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from google.cloud import documentai_v1 as documentai
+
+from event_log import log_event
+
+MODES = ("live", "record", "replay")
+DEFAULT_CASSETTE_DIR = ".docai_cassettes"
+
+
+class CassetteMiss(KeyError):
+    """Requisição sem resposta gravada no cassete (modo replay)."""
+
+
+def fingerprint(request) -> str:
+    """SHA-256 do ProcessRequest serializado de forma determinística."""
+    pb = documentai.ProcessRequest.pb(request)
+    return hashlib.sha256(pb.SerializeToString(deterministic=True)).hexdigest()
+
+
+class Cassette:
+    def __init__(self, directory: str = DEFAULT_CASSETTE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def save(self, request, response, latency_s: float) -> str:
+        key = fingerprint(request)
+        self._write(self._path(key, "pb"), documentai.ProcessResponse.serialize(response))
+        meta = {
+            "fingerprint": key,
+            "latency_s": round(latency_s, 4),
+            "processor": request.name,
+            "mime_type": request.raw_document.mime_type,
+            "content_bytes": len(request.raw_document.content),
+            "field_mask": list(request.field_mask.paths) if request.field_mask else [],
+            "recorded_at": time.time(),
+        }
+        self._write(self._path(key, "json"), json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))
+        return key
+
+    def load(self, request) -> tuple[object, dict]:
+        key = fingerprint(request)
+        try:
+            with open(self._path(key, "pb"), "rb") as f:
+                response = documentai.ProcessResponse.deserialize(f.read())
+        except FileNotFoundError:
+            raise CassetteMiss(key) from None
+        try:
+            with open(self._path(key, "json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            meta = {"fingerprint": key, "latency_s": 0.0}
+        return response, meta
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".pb"))
+
+
+class RecordingClient:
+    """Client real + gravação de cada resposta de process_document no cassete."""
+
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self.cassette = cassette
+
+    def process_document(self, request, timeout=None, **kwargs):
+        start = time.perf_counter()
+        response = self._client.process_document(request=request, timeout=timeout, **kwargs)
+        latency = time.perf_counter() - start
+        try:
+            key = self.cassette.save(request, response, latency)
+            log_event("docai_recorded", fingerprint=key, latency_s=round(latency, 4))
+        except OSError as e:
+            log_event("docai_record_failed", level="warning", error=str(e))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)  # get_processor e demais chamadas vão direto
+
+
+class ReplayClient:
+    """Serve respostas gravadas, sem rede nem credenciais."""
+
+    def __init__(self, cassette: Cassette, simulate_latency: bool = False):
+        self.cassette = cassette
+        self.simulate_latency = simulate_latency
+
+    def process_document(self, request, timeout=None, **kwargs):
+        response, meta = self.cassette.load(request)
+        if self.simulate_latency:
+            time.sleep(meta.get("latency_s", 0.0))
+        return response
+
+    def get_processor(self, name, timeout=None, **kwargs):
+        return documentai.Processor(name=name, type_="OCR_PROCESSOR", state="ENABLED")
+
+
+def open_client(mode: str, live_factory, cassette_dir: str = DEFAULT_CASSETTE_DIR, simulate_latency: bool = False):
+    """
+    Client conforme o modo. live_factory() cria o client real (não é chamado em replay,
+    então a reprodução funciona sem credenciais).
+    """
+    if mode not in MODES:
+        raise ValueError(f"docai_mode inválido: {mode!r} (use {', '.join(MODES)})")
+    if mode == "replay":
+        return ReplayClient(Cassette(cassette_dir), simulate_latency=simulate_latency)
+    client = live_factory()
+    if mode == "record":
+        return RecordingClient(client, Cassette(cassette_dir))
+    return client
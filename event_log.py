@@ -0,0 +1,182 @@
+"""
+Log estruturado em JSONL com escrita assíncrona (substitui print() no caminho crítico).
+
+- log_event() só enfileira o evento; uma thread de fundo serializa e grava em lote
+- fila limitada com política de descarte: se cheia, o evento novo é descartado e
+  contado; o total descartado é registrado no próximo lote gravado ("log_dropped")
+- rotação por tamanho: events.jsonl → events.jsonl.1 → ... → events.jsonl.N
+- eventos de alto volume (ex.: um por token) usam sample_event(), gravados só numa
+  fração `sample_rate`
+
+Cada linha é um objeto JSON com ts (ISO 8601 UTC), level, event, pid, thread e os
+campos do evento, pronto para um log shipper (Fluent Bit, Vector, etc.).
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, UTC
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+
+class EventLog:
+    def __init__(self, path: str = ".logs/events.jsonl", max_queue: int = 10000,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 sample_rate: float = 0.01, min_level: str = "debug", echo: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample_rate = sample_rate
+        self.min_level = LEVELS[min_level]
+        self.echo = echo  # repete warning/error no stderr (a partir da thread de escrita)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._file = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer_loop, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, event: str, level: str = "info", **fields) -> None:
+        if self._closed or LEVELS[level] < self.min_level:
+            return
+        record = {
+            "ts": datetime.now(UTC).isoformat(timespec="milliseconds"),
+            "level": level,
+            "event": event,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            **fields,
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def sample(self, event: str, level: str = "debug", **fields) -> None:
+        """Evento de alto volume: gravado apenas numa fração `sample_rate` das chamadas."""
+        if random.random() < self.sample_rate:
+            self.log(event, level=level, sampled=True, sample_rate=self.sample_rate, **fields)
+
+    # --------------------------------------------
+    # Thread de escrita
+    # --------------------------------------------
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _write(self, records: list[dict]) -> None:
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            records.append({
+                "ts": datetime.now(UTC).isoformat(timespec="milliseconds"),
+                "level": "warning",
+                "event": "log_dropped",
+                "pid": os.getpid(),
+                "count": dropped,
+            })
+        if self._file is None:
+            self._open()
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        self._file.write(lines)
+        self._file.flush()
+        if self.echo:
+            for r in records:
+                if LEVELS.get(r["level"], 0) >= LEVELS["warning"]:
+                    print(f"[{r['level']}] {r['event']}: {r}", file=sys.stderr)
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _writer_loop(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            batch = [record]
+            stop = False
+            while len(batch) < 1000:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            except Exception as e:  # nunca derruba a thread por erro de disco
+                print(f"⚠️ Erro gravando log de eventos: {e}", file=sys.stderr)
+            if stop:
+                break
+        if self._file is not None:
+            self._file.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Grava o que estiver na fila e encerra a thread."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def configure(**options) -> EventLog:
+    """Define o log padrão do processo (chamadas seguintes substituem o anterior)."""
+    global _default
+    with _default_lock:
+        previous, _default = _default, EventLog(**options)
+    if previous is not None:
+        previous.close()
+    return _default
+
+
+def get_event_log() -> EventLog:
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = EventLog()
+    return _default
+
+
+def log_event(event: str, level: str = "info", **fields) -> None:
+    get_event_log().log(event, level=level, **fields)
+
+
+def sample_event(event: str, level: str = "debug", **fields) -> None:
+    get_event_log().sample(event, level=level, **fields)
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    if _default is not None:
+        _default.close()
@@ -0,0 +1,149 @@
+"""
+Backend falso do Document AI (gRPC local) para testes de carga e perfis sem rede.
+
+Implementa ProcessDocument e GetProcessor do DocumentProcessorService com um
+handler genérico: a resposta é um Document sintético (grade de tokens/parágrafos
+em coordenadas normalizadas) após uma latência simulada. A field mask do request
+é respeitada no nível `pages.<campo>`, como no serviço real.
+
+Uso:
+    python fake_docai.py --port 50051 --latency 0.3 --tokens 300
+
+No app, aponte para ele em .streamlit/secrets.toml:
+    [google]
+    emulator_endpoint = "localhost:50051"
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent import futures
+
+import grpc
+from google.cloud import documentai_v1 as documentai
+
+SERVICE = "google.cloud.documentai.v1.DocumentProcessorService"
+WORDS = ["caderno", "escrita", "manual", "cursiva", "pagina", "linha", "texto", "nota", "data", "nome"]
+
+
+def synthetic_document(num_tokens: int = 300, tokens_per_paragraph: int = 10, seed: int = 0):
+    """Document com tokens em grade, parágrafos agrupando tokens consecutivos."""
+    rng = random.Random(seed)
+    Document = documentai.Document
+    cols = 10
+    rows = max(1, -(-num_tokens // cols))
+    text, tokens, paragraphs = "", [], []
+    para_start, para_box = 0, None
+
+    def layout(start, end, box, confidence):
+        x0, y0, x1, y1 = box
+        return Document.Page.Layout(
+            text_anchor=Document.TextAnchor(text_segments=[Document.TextAnchor.TextSegment(start_index=start, end_index=end)]),
+            bounding_poly=documentai.BoundingPoly(normalized_vertices=[
+                documentai.NormalizedVertex(x=x0, y=y0), documentai.NormalizedVertex(x=x1, y=y0),
+                documentai.NormalizedVertex(x=x1, y=y1), documentai.NormalizedVertex(x=x0, y=y1),
+            ]),
+            confidence=confidence,
+        )
+
+    for i in range(num_tokens):
+        row, col = divmod(i, cols)
+        box = (col / cols + 0.01, row / rows + 0.01, (col + 1) / cols - 0.01, (row + 1) / rows - 0.01)
+        word = rng.choice(WORDS)
+        last_in_paragraph = (i + 1) % tokens_per_paragraph == 0 or i == num_tokens - 1
+        start = len(text)
+        text += word + ("\n" if last_in_paragraph else " ")
+        tokens.append(Document.Page.Token(layout=layout(start, len(text), box, rng.uniform(0.3, 1.0))))
+        para_box = box if para_box is None else (
+            min(para_box[0], box[0]), min(para_box[1], box[1]), max(para_box[2], box[2]), max(para_box[3], box[3])
+        )
+        if last_in_paragraph:
+            paragraphs.append(Document.Page.Paragraph(layout=layout(para_start, len(text), para_box, 0.9)))
+            para_start, para_box = len(text), None
+
+    page = Document.Page(
+        page_number=1,
+        dimension=Document.Page.Dimension(width=1000, height=1000, unit="pixels"),
+        tokens=tokens,
+        paragraphs=paragraphs,
+        blocks=[Document.Page.Block(layout=p.layout) for p in paragraphs],
+    )
+    return Document(text=text, pages=[page])
+
+
+def _apply_field_mask(document, paths) -> "documentai.Document":
+    if not paths:
+        return document
+    Document = documentai.Document
+    page_fields = {p.split(".", 1)[1] for p in paths if p.startswith("pages.")}
+    trimmed = Document(text=document.text if "text" in paths else "")
+    if "pages" in paths:
+        trimmed.pages = document.pages
+    elif page_fields:
+        trimmed.pages = [
+            Document.Page(**{field: getattr(page, field) for field in page_fields if field in Document.Page.meta.fields})
+            for page in document.pages
+        ]
+    if "entities" in paths:
+        trimmed.entities = document.entities
+    return trimmed
+
+
+class FakeDocumentAI:
+    def __init__(self, latency: float = 0.3, jitter: float = 0.1, num_tokens: int = 300):
+        self.latency = latency
+        self.jitter = jitter
+        self.document = synthetic_document(num_tokens)
+        self._responses = {}  # field mask → resposta serializada
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def _response_bytes(self, paths: tuple[str, ...]) -> bytes:
+        with self._lock:
+            if paths not in self._responses:
+                document = _apply_field_mask(self.document, list(paths))
+                self._responses[paths] = documentai.ProcessResponse.serialize(documentai.ProcessResponse(document=document))
+            return self._responses[paths]
+
+    def process_document(self, request_bytes: bytes, context) -> bytes:
+        request = documentai.ProcessRequest.pb().FromString(request_bytes)
+        with self._lock:
+            self.requests += 1
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        return self._response_bytes(tuple(request.field_mask.paths))
+
+    def get_processor(self, request_bytes: bytes, context) -> bytes:
+        request = documentai.GetProcessorRequest.pb().FromString(request_bytes)
+        processor = documentai.Processor(name=request.name, type_="OCR_PROCESSOR", state="ENABLED")
+        return documentai.Processor.serialize(processor)
+
+
+def start_server(port: int = 0, latency: float = 0.3, jitter: float = 0.1, num_tokens: int = 300,
+                 max_workers: int = 64) -> tuple[grpc.Server, int, FakeDocumentAI]:
+    """Inicia o servidor (port=0 escolhe uma porta livre) e retorna (server, porta, backend)."""
+    backend = FakeDocumentAI(latency=latency, jitter=jitter, num_tokens=num_tokens)
+    handler = grpc.method_handlers_generic_handler(SERVICE, {
+        "ProcessDocument": grpc.unary_unary_rpc_method_handler(backend.process_document),
+        "GetProcessor": grpc.unary_unary_rpc_method_handler(backend.get_processor),
+    })
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    server.add_generic_rpc_handlers((handler,))
+    bound_port = server.add_insecure_port(f"localhost:{port}")
+    server.start()
+    return server, bound_port, backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend falso do Document AI (gRPC local)")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--latency", type=float, default=0.3, help="Latência simulada por requisição (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Variação aleatória da latência (s)")
+    parser.add_argument("--tokens", type=int, default=300, help="Tokens no Document sintético")
+    args = parser.parse_args()
+    server, port, _ = start_server(args.port, args.latency, args.jitter, args.tokens)
+    print(f"🧪 Fake Document AI em localhost:{port} (latência {args.latency}s, {args.tokens} tokens)")
+    server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""
+Teste de carga do app: N sessões Streamlit headless concorrentes contra o backend falso.
+
+Cada sessão (streamlit.testing.v1.AppTest, uma por fluxo) faz o caminho de um usuário:
+login → upload → processar → alternar opções da sidebar. O Document AI é substituído
+por fake_docai.py num subprocesso (latência simulada, sem rede e sem consumir cota),
+então CPU e memória medidas são só do servidor do app.
+
+Para cada nível de concorrência (--sessions 1,2,4,8) reporta:
+- vazão (fluxos/s) e latência p50/p95/p99 por etapa e do fluxo completo
+- CPU do processo (100% = 1 núcleo) e CPU por fluxo
+- RSS de pico e RSS incremental por sessão
+
+Os resultados (curva de escala) vão para um JSON e um CSV em --out-dir, nomeados com a
+revisão do git, para comparar entre versões:
+
+    python loadtest.py --sessions 1,2,4,8,16 --flows 3 --latency 0.3
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, UTC
+
+import grpc
+import streamlit as st
+from PIL import Image, ImageDraw
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import app_test as app_test_module
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "main.py")
+UPLOAD_KEY = "_loadtest_upload"
+# share_apptest_runtime() mexe em internos do AppTest; validado nestas versões do Streamlit
+SUPPORTED_STREAMLIT = ("1.66",)
+STEPS = ["login", "upload", "process", "toggle"]
+
+LOGIN_EMAIL = "loadtest@example.com"
+LOGIN_PASSWORD = "loadtest"
+
+
+# --------------------------------------------
+# Upload headless: AppTest não simula st.file_uploader
+# --------------------------------------------
+class _Upload(io.BytesIO):
+    def __init__(self, data: bytes, name: str, file_id: str):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.file_id = file_id  # como UploadedFile: um id por upload
+
+
+def _file_uploader(label, *args, **kwargs):
+    # Arquivo "enviado" pela sessão fica no session_state (cada AppTest tem o seu)
+    upload = st.session_state.get(UPLOAD_KEY)
+    if upload is None:
+        return [] if kwargs.get("accept_multiple_files") else None
+    file = _Upload(upload["data"], upload["name"], upload["file_id"])
+    return [file] if kwargs.get("accept_multiple_files") else file
+
+
+def sample_image(seed: int, size: tuple[int, int] = (1200, 900)) -> bytes:
+    """PNG com traços aleatórios: imagens distintas por sessão (não caem no dedupe perceptual)."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(60):
+        points = [(rng.randrange(size[0]), rng.randrange(size[1])) for _ in range(2)]
+        draw.line(points, fill="black", width=rng.randint(2, 6))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# --------------------------------------------
+# Backend falso e métricas do processo
+# --------------------------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_backend(latency: float, jitter: float, tokens: int) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(APP_DIR, "fake_docai.py"), "--port", str(port),
+         "--latency", str(latency), "--jitter", str(jitter), "--tokens", str(tokens)],
+        stdout=subprocess.DEVNULL,
+    )
+    endpoint = f"localhost:{port}"
+    with grpc.insecure_channel(endpoint) as channel:
+        grpc.channel_ready_future(channel).result(timeout=30)
+    return process, endpoint
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # pico (fallback fora do Linux)
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RssSampler:
+    """Amostra o RSS em background e guarda o pico do nível de carga."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "count": 0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 1), "count": len(ordered)}
+
+
+# --------------------------------------------
+# Sessão simulada
+# --------------------------------------------
+def write_secrets(endpoint: str) -> None:
+    """
+    secrets.toml no diretório de trabalho, compartilhado por todas as sessões.
+    (AppTest.secrets troca o st.secrets global a cada rerun — com sessões concorrentes
+    uma sessão restauraria os secrets vazios no meio da execução de outra.)
+    """
+    os.makedirs(".streamlit", exist_ok=True)
+    with open(os.path.join(".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        f.write(
+            "[app]\n"
+            f'email = "{LOGIN_EMAIL}"\n'
+            f'password = "{LOGIN_PASSWORD}"\n'
+            "usage_limit = 1000000000\n\n"
+            "[app.test]\n"
+            'email = "loadtest-test@example.com"\n'
+            'password = "loadtest"\n'
+            "usage_limit = 1000000000\n\n"
+            "[google]\n"
+            'project_id_numeric = "0"\n'
+            'project_id_string = "loadtest"\n'
+            'location = "us"\n'
+            'processor_id = "loadtest"\n'
+            'application_credentials_path = ""\n'
+            f'emulator_endpoint = "{endpoint}"\n'
+            "requests_per_minute = 1000000\n"  # mede o app, não o limite de cota
+            "requests_burst = 10000\n"
+        )
+
+
+class _KeepRuntime(type):
+    def __setattr__(cls, name, value):
+        if name == "_instance":
+            # Mantém o primeiro runtime simulado: o próximo fim de rerun não o zera
+            if value is not None and Runtime._instance is None:
+                Runtime._instance = value
+            return
+        super().__setattr__(name, value)
+
+
+class _SharedRuntime(Runtime, metaclass=_KeepRuntime):
+    pass
+
+
+def share_apptest_runtime() -> None:
+    """
+    Permite AppTests concorrentes no mesmo processo. Ao fim de cada rerun o AppTest
+    zera o Runtime global e restaura `global.appTest`; com várias sessões isso
+    derrubaria os reruns das outras ("Runtime hasn't been created!").
+    Depende de internos do Streamlit: falha logo em versões não validadas.
+    """
+    version = ".".join(st.__version__.split(".")[:2])
+    if version not in SUPPORTED_STREAMLIT:
+        raise RuntimeError(
+            f"Streamlit {st.__version__} não validado para sessões concorrentes do AppTest "
+            f"(suportado: {', '.join(SUPPORTED_STREAMLIT)}.x)"
+        )
+    if getattr(app_test_module, "Runtime", None) is not Runtime or not hasattr(Runtime, "_instance"):
+        raise RuntimeError(f"Streamlit {st.__version__}: app_test.Runtime/_instance não encontrados; atualize share_apptest_runtime()")
+    app_test_module.Runtime = _SharedRuntime
+    config.set_option("global.appTest", True)
+
+
+def new_session(timeout: float) -> AppTest:
+    return AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+
+def _click(at: AppTest, label_prefix: str) -> None:
+    for button in at.button:
+        if button.label.startswith(label_prefix):
+            button.click()
+            return
+    raise RuntimeError(f"botão '{label_prefix}' não encontrado")
+
+
+def _check(at: AppTest, step: str) -> None:
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].message}")
+    if at.error:
+        raise RuntimeError(f"{step}: {at.error[0].value}")
+
+
+def run_flow(image: bytes, timeout: float) -> dict[str, float]:
+    """Um usuário do início ao fim; retorna a duração (s) de cada etapa."""
+    timings = {}
+    at = new_session(timeout)
+
+    start = time.perf_counter()
+    at.run()
+    at.text_input[0].input(LOGIN_EMAIL)
+    at.text_input[1].input(LOGIN_PASSWORD)
+    _click(at, "Entrar")
+    at.run()
+    _check(at, "login")
+    timings["login"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    at.session_state[UPLOAD_KEY] = {"data": image, "name": "pagina.png", "file_id": uuid.uuid4().hex}
+    at.run()
+    _check(at, "upload")
+    timings["upload"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _click(at, "🚀")
+    at.run()
+    _check(at, "process")
+    if not at.success:
+        raise RuntimeError("process: nenhum resultado exibido")
+    timings["process"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(len(at.checkbox)):
+        checkbox = at.checkbox[i]
+        checkbox.set_value(not checkbox.value)
+        at.run()
+        _check(at, "toggle")
+    timings["toggle"] = time.perf_counter() - start
+    return timings
+
+
+def run_level(sessions: int, flows: int, timeout: float, seed: int) -> dict:
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker(index: int):
+        for flow in range(flows):
+            image = sample_image(seed + index * 1000 + flow)
+            flow_start = time.perf_counter()
+            try:
+                timings = run_flow(image, timeout)
+                timings["flow"] = time.perf_counter() - flow_start
+                with lock:
+                    results.append(timings)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+
+    baseline_rss = current_rss_mb()
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    with RssSampler() as sampler:
+        threads = [threading.Thread(target=worker, args=(i,), name=f"session-{i}") for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+
+    return {
+        "sessions": sessions,
+        "flows": len(results),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_s": round(wall, 3),
+        "throughput_flows_per_s": round(len(results) / wall, 3) if wall else 0.0,
+        "latency_ms": {step: percentiles([r[step] for r in results]) for step in STEPS + ["flow"]},
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+        "cpu_s_per_flow": round(cpu / len(results), 3) if results else None,
+        "rss_baseline_mb": round(baseline_rss, 1),
+        "rss_peak_mb": round(sampler.peak, 1),
+        "rss_per_session_mb": round(max(0.0, sampler.peak - baseline_rss) / sessions, 2),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(report: dict, out_dir: str) -> tuple[str, str]:
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+    base = os.path.join(out_dir, f"loadtest-{report['meta']['revision']}-{stamp}")
+    with open(f"{base}.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(f"{base}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "revision", "sessions", "flows", "errors", "throughput_flows_per_s",
+            *[f"{step}_{q}_ms" for step in STEPS + ["flow"] for q in ("p50", "p95", "p99")],
+            "cpu_percent", "cpu_s_per_flow", "rss_peak_mb", "rss_per_session_mb",
+        ])
+        for level in report["levels"]:
+            writer.writerow([
+                report["meta"]["revision"], level["sessions"], level["flows"], level["errors"],
+                level["throughput_flows_per_s"],
+                *[level["latency_ms"][step][q] for step in STEPS + ["flow"] for q in ("p50", "p95", "p99")],
+                level["cpu_percent"], level["cpu_s_per_flow"], level["rss_peak_mb"], level["rss_per_session_mb"],
+            ])
+    return f"{base}.json", f"{base}.csv"
+
+
+def print_table(levels: list[dict]) -> None:
+    print(f"{'sessões':>7} {'fluxos':>6} {'erros':>5} {'fluxos/s':>8} {'proc p50':>9} {'proc p95':>9} "
+          f"{'proc p99':>9} {'fluxo p95':>10} {'CPU%':>6} {'RSS pico':>9} {'RSS/sessão':>10}")
+    for level in levels:
+        process, flow = level["latency_ms"]["process"], level["latency_ms"]["flow"]
+        print(f"{level['sessions']:>7} {level['flows']:>6} {level['errors']:>5} {level['throughput_flows_per_s']:>8.2f} "
+              f"{process['p50'] or 0:>7.0f}ms {process['p95'] or 0:>7.0f}ms {process['p99'] or 0:>7.0f}ms "
+              f"{flow['p95'] or 0:>8.0f}ms {level['cpu_percent']:>6.1f} {level['rss_peak_mb']:>7.0f}MB "
+              f"{level['rss_per_session_mb']:>8.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do Visualizer OCR (sessões headless + Document AI falso)")
+    parser.add_argument("--sessions", default="1,2,4,8", help="Níveis de concorrência, separados por vírgula")
+    parser.add_argument("--flows", type=int, default=3, help="Fluxos completos por sessão em cada nível")
+    parser.add_argument("--latency", type=float, default=0.3, help="Latência simulada do Document AI (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Variação da latência simulada (s)")
+    parser.add_argument("--tokens", type=int, default=300, help="Tokens por Document sintético")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout de cada rerun do script (s)")
+    parser.add_argument("--endpoint", default="", help="Backend já em execução (host:porta); vazio = inicia fake_docai.py")
+    parser.add_argument("--workdir", default="", help="Diretório de trabalho do app (estado de uso, índices, logs); vazio = temporário")
+    parser.add_argument("--out-dir", default=os.path.join(APP_DIR, "loadtest_results"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+    try:
+        share_apptest_runtime()
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    backend = None
+    endpoint = args.endpoint
+    if not endpoint:
+        backend, endpoint = start_fake_backend(args.latency, args.jitter, args.tokens)
+
+    # Estado do app (uso mensal, hash perceptual, logs) fora do repositório
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="visualizer-loadtest-"))
+    write_secrets(endpoint)
+    st.file_uploader = _file_uploader
+    # session_state é escrito de fora do script entre reruns (upload simulado)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    try:
+        # Aquecimento: carrega módulos e recursos em cache fora da medição
+        run_flow(sample_image(args.seed - 1), args.timeout)
+
+        report = {
+            "meta": {
+                "revision": git_revision(),
+                "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "cpu_count": os.cpu_count(),
+                "flows_per_session": args.flows,
+                "latency_s": args.latency,
+                "jitter_s": args.jitter,
+                "tokens": args.tokens,
+                "workdir": os.getcwd(),
+            },
+            "levels": [],
+        }
+        for sessions in levels:
+            print(f"▶️ {sessions} sessão(ões) x {args.flows} fluxo(s)...", flush=True)
+            report["levels"].append(run_level(sessions, args.flows, args.timeout, args.seed + sessions * 100_000))
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait()
+
+    print_table(report["levels"])
+    json_path, csv_path = write_results(report, args.out_dir)
+    print(f"📈 Curva de escala: {json_path} | {csv_path}")
+    sys.exit(1 if any(level["errors"] for level in report["levels"]) else 0)
+
+
+if __name__ == "__main__":
+    main()
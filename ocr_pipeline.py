@@ -0,0 +1,243 @@
+"""
+Núcleo do pipeline de OCR (sem dependência do Streamlit).
+
+Usado pelo app (main.py) e pelo daemon de pasta monitorada (watch_folder.py):
+- criação do client regional do Document AI
+- chamada process_document passando pelo rate limiter compartilhado
+- extração de texto por parágrafos e desenho de bounding boxes
+"""
+import io
+import re
+import time
+
+from PIL import Image, ImageDraw
+from google.cloud import documentai_v1 as documentai
+from google.cloud.documentai_v1 import (
+    DocumentProcessorServiceClient,
+    ProcessRequest,
+    RawDocument,
+)
+from google.cloud.documentai_v1.types import ProcessOptions, OcrConfig
+from google.oauth2 import service_account
+from google.api_core.client_options import ClientOptions
+from google.api_core.exceptions import ResourceExhausted
+from google.protobuf import field_mask_pb2
+
+from event_log import log_event, sample_event
+
+LANGUAGE_HINTS = ["pt", "en"]
+
+
+def get_mime_type(file_extension: str) -> str:
+    mime_types = {
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".png": "image/png",
+        ".pdf": "application/pdf",
+    }
+    return mime_types.get(file_extension.lower(), "application/octet-stream")
+
+
+def create_client(credentials_info: dict, location: str) -> DocumentProcessorServiceClient:
+    credentials = service_account.Credentials.from_service_account_info(
+        credentials_info,
+        scopes=["https://www.googleapis.com/auth/cloud-platform"]
+    )
+    return DocumentProcessorServiceClient(
+        credentials=credentials,
+        client_options=ClientOptions(api_endpoint=f"{location}-documentai.googleapis.com")
+    )
+
+
+def create_emulator_client(endpoint: str) -> DocumentProcessorServiceClient:
+    """Client sem credenciais e sem TLS para um backend local (ex.: fake_docai.py)."""
+    import grpc
+    from google.cloud.documentai_v1.services.document_processor_service.transports import (
+        DocumentProcessorServiceGrpcTransport,
+    )
+    channel = grpc.insecure_channel(endpoint)
+    return DocumentProcessorServiceClient(transport=DocumentProcessorServiceGrpcTransport(channel=channel))
+
+
+def processor_name(project_id: str, location: str, processor_id: str) -> str:
+    return f"projects/{project_id}/locations/{location}/processors/{processor_id}"
+
+
+def warm_client(client, name: str, timeout: float = 30.0) -> None:
+    """
+    Abre o canal do Document AI (DNS, TLS, token OAuth) com uma chamada leve
+    de metadados (get_processor), que não consome cota de processamento.
+    """
+    client.get_processor(name=name, timeout=timeout)
+
+
+def synthetic_content() -> tuple[bytes, str]:
+    """Imagem mínima (PNG em branco) para uma requisição sintética de aquecimento."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 32), "white").save(buffer, format="PNG")
+    return buffer.getvalue(), "image/png"
+
+
+def build_field_mask(show_boxes: bool, by_lines: bool, show_entities: bool) -> list[str]:
+    """
+    Campos do Document realmente usados pelas opções ativas.
+    O Document AI só aceita campos de topo ou `pages.<campo>` na máscara.
+    """
+    paths = ["text", "pages.page_number", "pages.dimension"]
+    if show_boxes:
+        paths.append("pages.tokens")
+    if by_lines:
+        paths += ["pages.paragraphs", "pages.blocks"]  # blocks: fallback sem parágrafos
+    if show_entities:
+        paths.append("entities")
+    return paths
+
+
+def process_document(client, name: str, content: bytes, mime_type: str, rate_limiter=None,
+                     max_attempts: int = 3, field_mask: list[str] | None = None,
+                     rate_limit_waits: list[float] | None = None):
+    """
+    Envia o conteúdo ao Document AI e retorna o Document.
+    - Passa pelo rate limiter compartilhado; RESOURCE_EXHAUSTED empurra a fila e tenta de novo
+    - field_mask: devolve só os campos listados (resposta menor e parse mais rápido)
+    - rate_limit_waits: recebe a espera (s) de cada tentativa; somável entre threads (tiles)
+    """
+    raw_document = RawDocument(content=content, mime_type=mime_type)
+
+    ocr_config = OcrConfig(
+        hints=documentai.OcrConfig.Hints(language_hints=LANGUAGE_HINTS)
+    )
+
+    process_options = ProcessOptions(ocr_config=ocr_config)
+
+    request = ProcessRequest(
+        name=name,
+        raw_document=raw_document,
+        process_options=process_options,
+    )
+    if field_mask:
+        request.field_mask = field_mask_pb2.FieldMask(paths=field_mask)
+
+    for attempt in range(1, max_attempts + 1):
+        if rate_limiter is not None:
+            wait = rate_limiter.acquire()
+            if rate_limit_waits is not None:
+                rate_limit_waits.append(wait)
+        try:
+            result = client.process_document(request=request, timeout=120.0)
+            return result.document
+        except ResourceExhausted as e:
+            if attempt == max_attempts:
+                raise
+            log_event("documentai_resource_exhausted", level="warning", attempt=attempt, max_attempts=max_attempts, error=str(e))
+            if rate_limiter is not None:
+                rate_limiter.penalize()
+
+
+def response_size_and_parse_time(document) -> tuple[int, float]:
+    """Bytes do Document serializado e tempo (s) para desserializá-lo de novo."""
+    serialized = type(document).serialize(document)
+    start = time.perf_counter()
+    type(document).deserialize(serialized)
+    return len(serialized), time.perf_counter() - start
+
+
+def units_for(document) -> int:
+    # 1 unidade por imagem, ou por número de páginas se multi-página
+    return len(getattr(document, "pages", [])) if getattr(document, "pages", []) else 1
+
+
+def _text_from_anchor(text_anchor, full_text: str) -> str:
+    if not text_anchor or not full_text:
+        return ""
+    segments = getattr(text_anchor, "text_segments", None)
+    if segments:
+        parts = []
+        for seg in segments:
+            start = seg.start_index if seg.start_index is not None else 0
+            end = seg.end_index
+            if end is None:
+                continue
+            parts.append(full_text[start:end])
+        return "".join(parts).strip()
+
+    content_locations = getattr(text_anchor, "content_locations", None)
+    if content_locations:
+        try:
+            loc = content_locations[0].location
+            start = getattr(getattr(loc, "segment", None), "index", 0) or 0
+            length = getattr(content_locations[0], "length", 0) or 0
+            return full_text[start : start + length].strip()
+        except Exception:
+            return ""
+    return ""
+
+
+def extract_text_by_paragraphs(document) -> list[str]:
+    if not getattr(document, "pages", None):
+        return [document.text.strip()] if document.text else ["Nenhum texto detectado."]
+
+    lines = []
+    full_text = document.text or ""
+
+    for page in document.pages:
+        for p in getattr(page, "paragraphs", []):
+            para_text = _text_from_anchor(getattr(p.layout, "text_anchor", None), full_text)
+            para_text = re.sub(r"\s+", " ", para_text).strip()
+            if para_text:
+                lines.append(para_text)
+
+    if not lines:
+        for page in document.pages:
+            for b in getattr(page, "blocks", []):
+                block_text = _text_from_anchor(getattr(b.layout, "text_anchor", None), full_text)
+                block_text = re.sub(r"\s+", " ", block_text).strip()
+                if block_text:
+                    lines.append(block_text)
+
+    if not lines:
+        return [full_text.strip()] if full_text else ["Nenhum texto detectado."]
+    return lines
+
+
+def draw_bounding_boxes(image: Image.Image, document) -> Image.Image:
+    if not getattr(document, "pages", None):
+        return image
+    if not getattr(document.pages[0], "tokens", None):
+        return image
+
+    draw = ImageDraw.Draw(image)
+    page = document.pages[0]
+    width, height = image.size
+
+    for token in page.tokens:
+        try:
+            bpoly = getattr(token.layout, "bounding_poly", None)
+            if not bpoly:
+                continue
+
+            vertices = getattr(bpoly, "normalized_vertices", None)
+            if vertices and len(vertices) >= 2:
+                x_coords = [v.x * width for v in vertices]
+                y_coords = [v.y * height for v in vertices]
+            else:
+                abs_vertices = getattr(bpoly, "vertices", None)
+                if not abs_vertices or len(abs_vertices) < 2:
+                    continue
+                x_coords = [v.x for v in abs_vertices]
+                y_coords = [v.y for v in abs_vertices]
+
+            x_min, x_max = min(x_coords), max(x_coords)
+            y_min, y_max = min(y_coords), max(y_coords)
+            draw.rectangle([x_min, y_min, x_max, y_max], outline="red", width=2)
+
+            token_text = _text_from_anchor(getattr(token.layout, "text_anchor", None), document.text or "")
+            if token_text:
+                label = token_text[:10] + ("..." if len(token_text) > 10 else "")
+                draw.text((x_min, max(0, y_min - 14)), label, fill="red")
+
+        except Exception as e:
+            sample_event("draw_token_error", level="warning", error=str(e))
+            continue
+
+    return image
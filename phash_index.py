@@ -0,0 +1,137 @@
+"""
+Detecção de quase-duplicatas por hash perceptual (dHash de 64 bits).
+
+Antes de gastar uma unidade de cota, o hash da imagem é comparado (distância de
+Hamming) com todas as imagens já processadas. Os hashes ficam num array numpy
+em memória, então a busca é um XOR + popcount vetorizado: ~1 ms para 100k hashes.
+O Document de cada imagem é guardado serializado em SQLite para reutilização, junto
+com o field mask da requisição: um resultado só é reaproveitado se o mask guardado
+cobre o pedido agora (None = Document completo, cobre qualquer mask).
+"""
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 = 64 bits
+
+# Popcount por byte (fallback para numpy < 2.0, sem np.bitwise_count)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """Difference hash: compara pixels vizinhos de uma miniatura em tons de cinza."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def _to_signed(value: int) -> int:
+    # SQLite guarda INTEGER com sinal (64 bits)
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _load_mask(value: str | None) -> frozenset | None:
+    return None if value is None else frozenset(json.loads(value))
+
+
+def mask_covers(stored: frozenset | None, requested: list[str] | None) -> bool:
+    """O Document guardado com o mask `stored` tem todos os campos pedidos em `requested`?"""
+    if stored is None:
+        return True
+    if requested is None:
+        return False
+    # "pages" cobre "pages.tokens"; "pages.tokens" não cobre "pages"
+    return all(
+        any(path == field or path.startswith(field + ".") for field in stored)
+        for path in requested
+    )
+
+
+class PerceptualIndex:
+    """Índice de hashes → Document processado, persistido em SQLite."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            "id INTEGER PRIMARY KEY, hash INTEGER NOT NULL, file_name TEXT, "
+            "created_at REAL, document BLOB, field_mask TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(images)")}
+        if "field_mask" not in columns:
+            # Índices antigos não registravam o mask: "[]" (desconhecido) não cobre nenhum pedido
+            self._conn.execute("ALTER TABLE images ADD COLUMN field_mask TEXT DEFAULT '[]'")
+        self._conn.commit()
+
+        rows = self._conn.execute("SELECT id, hash, field_mask FROM images ORDER BY id").fetchall()
+        capacity = max(1024, len(rows) * 2)
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._masks = [_load_mask(mask) for _, _, mask in rows]
+        self._size = len(rows)
+        if rows:
+            ids, hashes, _ = zip(*rows)
+            self._ids[: self._size] = ids
+            self._hashes[: self._size] = np.array(hashes, dtype=np.int64).view(np.uint64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find(self, image_hash: int, max_distance: int,
+             field_mask: list[str] | None = None) -> tuple[int, int] | None:
+        """
+        Retorna (id, distância) do vizinho mais próximo dentro de max_distance cujo
+        field mask cobre `field_mask` (None = Document completo), ou None.
+        """
+        with self._lock:
+            if self._size == 0:
+                return None
+            distances = _popcount(self._hashes[: self._size] ^ np.uint64(image_hash))
+            candidates = np.flatnonzero(distances <= max_distance)
+            for index in candidates[np.argsort(distances[candidates], kind="stable")]:
+                if mask_covers(self._masks[index], field_mask):
+                    return int(self._ids[index]), int(distances[index])
+            return None
+
+    def add(self, image_hash: int, file_name: str, document_bytes: bytes,
+            field_mask: list[str] | None = None) -> int:
+        """Guarda o Document obtido com `field_mask` (None = completo)."""
+        stored_mask = None if field_mask is None else json.dumps(sorted(set(field_mask)))
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO images (hash, file_name, created_at, document, field_mask) VALUES (?, ?, ?, ?, ?)",
+                (_to_signed(image_hash), file_name, time.time(), document_bytes, stored_mask),
+            )
+            self._conn.commit()
+            if self._size == len(self._hashes):
+                self._hashes = np.resize(self._hashes, self._size * 2)
+                self._ids = np.resize(self._ids, self._size * 2)
+            self._hashes[self._size] = np.uint64(image_hash)
+            self._ids[self._size] = cursor.lastrowid
+            self._masks.append(_load_mask(stored_mask))
+            self._size += 1
+            return cursor.lastrowid
+
+    def get(self, row_id: int) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_name, created_at, document, field_mask FROM images WHERE id = ?", (row_id,)
+            ).fetchone()
+        if not row:
+            return None
+        mask = _load_mask(row[3])
+        return {"file_name": row[0], "created_at": row[1], "document": row[2],
+                "field_mask": None if mask is None else sorted(mask)}
@@ -0,0 +1,145 @@
+"""
+Pipeline em estágios com filas limitadas entre eles (sem dependência do Streamlit).
+
+Cada estágio roda em suas próprias threads e recebe/entrega um dicionário de contexto
+por item; com estágios decode → OCR → parse → render, enquanto o arquivo N está no OCR,
+o N+1 já está sendo decodificado e o N−1 renderizado. As filas limitadas (queue_size)
+dão backpressure: um estágio lento segura os anteriores em vez de acumular memória.
+
+Um erro num estágio marca o item (ctx["error"], ctx["failed_stage"]) e ele atravessa os
+estágios seguintes sem processamento, para o consumidor reportar.
+
+metrics() mostra, por estágio, o tempo ocupado, a utilização (ocupado / (duração x workers)),
+a espera por entrada (estágio anterior lento) e o tempo bloqueado na saída (estágio
+seguinte lento) — o estágio com maior utilização é o gargalo.
+"""
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class StagedPipeline:
+    def __init__(self, stages: list[tuple[str, callable, int]], queue_size: int = 2):
+        """stages: (nome, fn(ctx) -> None, workers). fn altera o ctx no lugar."""
+        self.stages = stages
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started_at = None
+        self._finished_at = None
+        self._metrics = {
+            name: {"workers": workers, "items": 0, "errors": 0, "busy_s": 0.0, "wait_input_s": 0.0, "blocked_output_s": 0.0}
+            for name, _, workers in stages
+        }
+
+    # --------------------------------------------
+    # Filas com parada cooperativa (consumidor pode abandonar o gerador)
+    # --------------------------------------------
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _feed(self, items, output: queue.Queue) -> None:
+        for index, item in enumerate(items):
+            if not self._put(output, {"index": index, "item": item, "error": None, "failed_stage": None, "timings": {}}):
+                return
+        self._put(output, _DONE)
+
+    def _work(self, name: str, fn, inbox: queue.Queue, outbox: queue.Queue, remaining: list[int]) -> None:
+        metrics = self._metrics[name]
+        while True:
+            start = time.perf_counter()
+            ctx = self._get(inbox)
+            waited = time.perf_counter() - start
+            if ctx is _DONE:
+                self._put(inbox, _DONE)  # repassa o fim aos outros workers do estágio
+                break
+
+            start = time.perf_counter()
+            failed = False
+            if ctx["error"] is None:
+                try:
+                    fn(ctx)
+                except Exception as e:
+                    ctx["error"], ctx["failed_stage"] = str(e), name
+                    failed = True
+            busy = time.perf_counter() - start
+            ctx["timings"][name] = busy
+
+            start = time.perf_counter()
+            delivered = self._put(outbox, ctx)
+            blocked = time.perf_counter() - start
+            with self._lock:
+                metrics["items"] += 1
+                metrics["errors"] += int(failed)
+                metrics["busy_s"] += busy
+                metrics["wait_input_s"] += waited
+                metrics["blocked_output_s"] += blocked
+            if not delivered:
+                break
+
+        with self._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            self._put(outbox, _DONE)
+
+    def run(self, items):
+        """Gerador: alimenta os itens e devolve cada ctx ao sair do último estágio (ordem de conclusão)."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), name="pipeline-feed", daemon=True)]
+        for i, (name, fn, workers) in enumerate(self.stages):
+            remaining = [workers]
+            threads += [
+                threading.Thread(target=self._work, args=(name, fn, queues[i], queues[i + 1], remaining),
+                                 name=f"pipeline-{name}-{w}", daemon=True)
+                for w in range(workers)
+            ]
+
+        self._started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                ctx = self._get(queues[-1])
+                if ctx is _DONE:
+                    break
+                yield ctx
+        finally:
+            self._finished_at = time.perf_counter()
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=5.0)
+
+    def metrics(self) -> dict:
+        """Métricas por estágio e o gargalo (maior utilização)."""
+        end = self._finished_at or time.perf_counter()
+        wall = max(end - self._started_at, 1e-9) if self._started_at else 0.0
+        with self._lock:
+            stages = {}
+            for name, m in self._metrics.items():
+                stages[name] = {
+                    **m,
+                    "busy_s": round(m["busy_s"], 3),
+                    "wait_input_s": round(m["wait_input_s"], 3),
+                    "blocked_output_s": round(m["blocked_output_s"], 3),
+                    "avg_s": round(m["busy_s"] / m["items"], 3) if m["items"] else 0.0,
+                    "utilization": round(m["busy_s"] / (wall * m["workers"]), 3) if wall else 0.0,
+                }
+        bottleneck = max(stages, key=lambda n: stages[n]["utilization"]) if stages else None
+        return {"wall_s": round(wall, 3), "stages": stages, "bottleneck": bottleneck}
@@ -0,0 +1,187 @@
+"""
+Pós-processamento dos resultados do OCR num pool de processos (trabalho de CPU).
+
+Depois que o Document AI responde, extrair parágrafos, serializar o Document em JSON,
+desenhar as bounding boxes e codificar o PNG anotado são puro CPU; numa thread só,
+viram o gargalo do lote assim que as chamadas de rede se sobrepõem.
+
+Os workers recebem o Document serializado (bytes do protobuf) e o caminho da imagem —
+nada de objetos PIL ou proto-plus "picklados" — e gravam os resultados direto no disco:
+    <prefixo>.txt            texto por parágrafos
+    <prefixo>.json           Document completo
+    <prefixo>.annotated.png  imagem com bounding boxes (opcional, só imagens com tokens)
+
+render_images() é a variante em memória para o lote do app: recebe os bytes da imagem
+e devolve PNGs (boxes, mapa de calor) e o JSON, sem tocar no disco.
+"""
+import io
+import multiprocessing
+import multiprocessing.context
+import os
+import sys
+import time
+import types
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from PIL import Image
+from google.cloud import documentai_v1 as documentai
+
+from doc_stats import confidence_heatmap, token_table
+from event_log import configure as configure_event_log
+from ocr_pipeline import draw_bounding_boxes, extract_text_by_paragraphs, get_mime_type
+
+
+def worker_log_path(log_path: str, index: int) -> str:
+    """<stem>.worker-<n><ext>: não se confunde com as rotações do pai (<log_path>.1, .2, ...)."""
+    stem, ext = os.path.splitext(log_path)
+    return f"{stem}.worker-{index}{ext}"
+
+
+def _init_worker(log_path: str | None, counter) -> None:
+    # Um arquivo por worker (rotações independentes no mesmo arquivo perderiam registros),
+    # numerado 0..max_workers-1: os mesmos arquivos são reaproveitados entre reinícios
+    if log_path:
+        with counter.get_lock():
+            index = counter.value
+            counter.value += 1
+        configure_event_log(path=worker_log_path(log_path, index))
+
+
+def postprocess(document_bytes: bytes, out_prefix: str, image_path: str | None = None,
+                annotate: bool = True, write_json: bool = True) -> dict:
+    """Executado no worker: Document serializado → .txt, .json e PNG anotado. Retorna caminhos e tempos."""
+    timings = {}
+    start = time.perf_counter()
+    document = documentai.Document.deserialize(document_bytes)
+    timings["parse_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    paragraphs = extract_text_by_paragraphs(document)
+    txt_path = f"{out_prefix}.txt"
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(paragraphs))
+    timings["text_s"] = time.perf_counter() - start
+
+    json_path = None
+    if write_json:
+        start = time.perf_counter()
+        json_path = f"{out_prefix}.json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(documentai.Document.to_json(document))
+        timings["json_s"] = time.perf_counter() - start
+
+    annotated_path = None
+    is_image = image_path and get_mime_type(os.path.splitext(image_path)[1]).startswith("image/")
+    has_tokens = document.pages and document.pages[0].tokens
+    if annotate and is_image and has_tokens:
+        start = time.perf_counter()
+        with Image.open(image_path) as image:
+            annotated = draw_bounding_boxes(image.convert("RGB"), document)
+        timings["draw_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        annotated_path = f"{out_prefix}.annotated.png"
+        annotated.save(annotated_path, format="PNG")
+        timings["png_s"] = time.perf_counter() - start
+
+    return {
+        "paragraphs": len(paragraphs),
+        "txt_path": txt_path,
+        "json_path": json_path,
+        "annotated_path": annotated_path,
+        "timings": {k: round(v, 4) for k, v in timings.items()},
+        "pid": os.getpid(),
+    }
+
+
+def _png_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_images(document_bytes: bytes, image_bytes: bytes, boxes: bool = True, heatmap: bool = False) -> dict:
+    """Executado no worker: PNG anotado, PNG do mapa de calor (None se não pedidos) e o Document em JSON."""
+    timings = {}
+    start = time.perf_counter()
+    document = documentai.Document.deserialize(document_bytes)
+    timings["parse_s"] = time.perf_counter() - start
+
+    annotated = heatmap_png = None
+    if boxes or heatmap:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image.load()
+            if boxes:
+                start = time.perf_counter()
+                annotated = _png_bytes(draw_bounding_boxes(image.convert("RGB"), document))
+                timings["draw_s"] = time.perf_counter() - start
+            if heatmap:
+                start = time.perf_counter()
+                heatmap_png = _png_bytes(confidence_heatmap(image, token_table(document)))
+                timings["heatmap_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    document_json = documentai.Document.to_json(document)
+    timings["json_s"] = time.perf_counter() - start
+    return {
+        "annotated": annotated,
+        "heatmap": heatmap_png,
+        "json": document_json,
+        "timings": {k: round(v, 4) for k, v in timings.items()},
+        "pid": os.getpid(),
+    }
+
+
+class _WorkerProcess(multiprocessing.context.SpawnProcess):
+    """
+    Worker que não reexecuta o __main__ do pai: sob o Streamlit, __main__ é o script do
+    app (o spawn o rodaria inteiro em cada worker). Os workers só executam funções deste módulo.
+    """
+
+    def start(self):
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            super().start()
+        finally:
+            sys.modules["__main__"] = main
+
+
+class _WorkerContext(multiprocessing.context.SpawnContext):
+    Process = _WorkerProcess
+
+
+class PostProcessor:
+    """
+    Pool de processos para postprocess(). Por padrão um worker por núcleo.
+    Usa "spawn": o processo pai tem threads (watcher, workers, log), e fork com threads
+    ativas pode herdar locks travados. Com log_path, cada worker grava em worker_log_path().
+    """
+
+    def __init__(self, max_workers: int | None = None, log_path: str | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        context = _WorkerContext()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(log_path, context.Value("i", 0)),
+        )
+
+    def submit(self, document, out_prefix: str, image_path: str | None = None,
+               annotate: bool = True, write_json: bool = True) -> Future:
+        return self._executor.submit(
+            postprocess, type(document).serialize(document), out_prefix, image_path, annotate, write_json
+        )
+
+    def submit_render(self, document, image_bytes: bytes, boxes: bool = True, heatmap: bool = False) -> Future:
+        return self._executor.submit(render_images, type(document).serialize(document), image_bytes, boxes, heatmap)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "PostProcessor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
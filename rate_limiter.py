@@ -0,0 +1,166 @@
+"""
+Rate limiter compartilhado para a cota por minuto do Document AI.
+
+Implementa GCRA (Generic Cell Rate Algorithm), equivalente a um token bucket:
+cada chamada reserva o próximo "slot" livre de forma atômica e dorme até ele.
+Como a reserva é feita em ordem de chegada, os chamadores são enfileirados de
+forma justa (FIFO) em vez de falharem com RESOURCE_EXHAUSTED.
+
+Backends:
+- MemoryBackend: compartilhado entre sessões do mesmo processo do servidor.
+- SQLiteBackend: compartilhado entre processos (app + jobs em lote) via arquivo local.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+
+class RateLimitTimeout(Exception):
+    """Espera necessária excede o máximo permitido para um chamador."""
+
+
+class MemoryBackend:
+    """Estado do bucket em memória (um por processo)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tat = 0.0  # theoretical arrival time
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def reserve(self, interval: float, tolerance: float, max_wait: float) -> float:
+        with self._lock:
+            now = self.now()
+            tat = max(self._tat, now)
+            wait = max(0.0, tat - tolerance - now)
+            if wait > max_wait:
+                raise RateLimitTimeout(f"Espera de {wait:.1f}s excede o máximo de {max_wait:.1f}s")
+            self._tat = tat + interval
+            return wait
+
+    def penalize(self, seconds: float) -> None:
+        with self._lock:
+            self._tat = max(self._tat, self.now() + seconds)
+
+
+class SQLiteBackend:
+    """Estado do bucket em SQLite, serializado entre processos com BEGIN IMMEDIATE."""
+
+    def __init__(self, path: str, key: str = "documentai"):
+        self.path = path
+        self.key = key
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+
+    def now(self) -> float:
+        # Relógio de parede: precisa ser comparável entre processos
+        return time.time()
+
+    def _update(self, fn) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tat FROM rate_limit WHERE key = ?", (self.key,)).fetchone()
+            try:
+                new_tat, result = fn(row[0] if row else 0.0)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute(
+                "INSERT INTO rate_limit (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (self.key, new_tat),
+            )
+            conn.execute("COMMIT")
+            return result
+        finally:
+            conn.close()
+
+    def reserve(self, interval: float, tolerance: float, max_wait: float) -> float:
+        def _reserve(stored_tat):
+            now = self.now()
+            tat = max(stored_tat, now)
+            wait = max(0.0, tat - tolerance - now)
+            if wait > max_wait:
+                raise RateLimitTimeout(f"Espera de {wait:.1f}s excede o máximo de {max_wait:.1f}s")
+            return tat + interval, wait
+
+        return self._update(_reserve)
+
+    def penalize(self, seconds: float) -> None:
+        self._update(lambda stored_tat: (max(stored_tat, self.now() + seconds), None))
+
+
+class RateLimiter:
+    """
+    Limita chamadas a `rate_per_minute`, permitindo rajadas de até `burst` chamadas.
+    - acquire(): bloqueia até o slot reservado e retorna o tempo esperado (s)
+    - penalize(): empurra a fila quando a API ainda responde RESOURCE_EXHAUSTED
+    - metrics(): contadores do processo (esperas e requisições estranguladas)
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1, backend=None, max_wait: float = 300.0):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute deve ser positivo")
+        self.rate_per_minute = float(rate_per_minute)
+        self.burst = max(1, int(burst))
+        self.interval = 60.0 / self.rate_per_minute
+        self.tolerance = self.interval * (self.burst - 1)
+        self.max_wait = max_wait
+        self.backend = backend or MemoryBackend()
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "throttled": 0,
+            "timeouts": 0,
+            "resource_exhausted": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+        }
+
+    def acquire(self) -> float:
+        try:
+            wait = self.backend.reserve(self.interval, self.tolerance, self.max_wait)
+        except RateLimitTimeout:
+            with self._metrics_lock:
+                self._metrics["timeouts"] += 1
+            raise
+
+        if wait > 0:
+            time.sleep(wait)
+
+        with self._metrics_lock:
+            self._metrics["requests"] += 1
+            if wait > 0:
+                self._metrics["throttled"] += 1
+            self._metrics["wait_total_s"] += wait
+            self._metrics["wait_max_s"] = max(self._metrics["wait_max_s"], wait)
+        return wait
+
+    def penalize(self, seconds: float = 10.0) -> None:
+        """Nenhum slot é liberado antes de `seconds` a partir de agora (não acumula entre chamadores)."""
+        with self._metrics_lock:
+            self._metrics["resource_exhausted"] += 1
+        self.backend.penalize(seconds + self.tolerance)
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        requests = snapshot["requests"]
+        snapshot["wait_avg_s"] = snapshot["wait_total_s"] / requests if requests else 0.0
+        snapshot["rate_per_minute"] = self.rate_per_minute
+        snapshot["burst"] = self.burst
+        snapshot["backend"] = type(self.backend).__name__
+        return snapshot
@@ -0,0 +1,162 @@
+"""Costura dos tiles: sobreposições sem duplicatas e coordenadas na imagem inteira."""
+import pytest
+from google.cloud import documentai_v1 as documentai
+
+from tiling import REQUIRED_FIELDS, plan_tiles, stitch_documents, tile_field_mask
+
+WIDTH, HEIGHT = 5000, 3000
+
+
+def _poly(box, tile_box):
+    """Caixa em pixels da imagem inteira → normalized_vertices relativos ao tile."""
+    tx0, ty0, tx1, ty1 = tile_box
+    tw, th = tx1 - tx0, ty1 - ty0
+    x0, y0, x1, y1 = box
+    return documentai.BoundingPoly(normalized_vertices=[
+        documentai.NormalizedVertex(x=(x - tx0) / tw, y=(y - ty0) / th)
+        for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))
+    ])
+
+
+def _layout(start, end, box, tile_box):
+    return documentai.Document.Page.Layout(
+        text_anchor=documentai.Document.TextAnchor(
+            text_segments=[documentai.Document.TextAnchor.TextSegment(start_index=start, end_index=end)]
+        ),
+        bounding_poly=_poly(box, tile_box),
+        confidence=0.9,
+    )
+
+
+def _inside(box, tile_box):
+    return box[0] >= tile_box[0] and box[1] >= tile_box[1] and box[2] <= tile_box[2] and box[3] <= tile_box[3]
+
+
+def _tile_document(paragraphs, tile_box, with_paragraphs=True):
+    """
+    Resposta simulada do Document AI para um tile: cada parágrafo é uma lista de
+    (texto, caixa em pixels); só entram as palavras inteiras dentro do tile, então um
+    parágrafo cortado pela borda vira um parágrafo parcial.
+    """
+    text, tokens, paragraph_layouts = "", [], []
+    for paragraph in paragraphs:
+        words = [(word, box) for word, box in paragraph if _inside(box, tile_box)]
+        if not words:
+            continue
+        box = (min(b[0] for _, b in words), min(b[1] for _, b in words),
+               max(b[2] for _, b in words), max(b[3] for _, b in words))
+        paragraph_start = len(text)
+        for i, (word, word_box) in enumerate(words):
+            start = len(text)
+            text += word + ("\n" if i == len(words) - 1 else " ")
+            tokens.append(documentai.Document.Page.Token(layout=_layout(start, start + len(word), word_box, tile_box)))
+        if with_paragraphs:
+            paragraph_layouts.append(documentai.Document.Page.Paragraph(
+                layout=_layout(paragraph_start, len(text), box, tile_box)
+            ))
+    tw, th = tile_box[2] - tile_box[0], tile_box[3] - tile_box[1]
+    page = documentai.Document.Page(
+        page_number=1,
+        dimension=documentai.Document.Page.Dimension(width=tw, height=th),
+        tokens=tokens,
+        paragraphs=paragraph_layouts,
+    )
+    return documentai.Document(text=text, pages=[page])
+
+
+def _grid(cols=30, rows=20):
+    """600 palavras de 100x40 px espalhadas pela página; várias cruzam as bordas dos tiles."""
+    cell_w, cell_h = WIDTH / cols, HEIGHT / rows
+    return [
+        [(f"w{row}x{col}", (col * cell_w + 20, row * cell_h + 40, col * cell_w + 120, row * cell_h + 80))]
+        for row in range(rows) for col in range(cols)
+    ]
+
+
+def _stitch(paragraphs, with_paragraphs=True):
+    tiles = plan_tiles(WIDTH, HEIGHT)
+    documents = [_tile_document(paragraphs, tile["box"], with_paragraphs) for tile in tiles]
+    return tiles, documents, stitch_documents(tiles, documents, (WIDTH, HEIGHT))
+
+
+def _token_words(document):
+    words = []
+    for token in document.pages[0].tokens:
+        segment = token.layout.text_anchor.text_segments[0]
+        words.append(document.text[segment.start_index:segment.end_index])
+    return words
+
+
+def _token_boxes(document):
+    boxes = {}
+    for word, token in zip(_token_words(document), document.pages[0].tokens):
+        vertices = token.layout.bounding_poly.normalized_vertices
+        boxes[word] = (vertices[0].x * WIDTH, vertices[0].y * HEIGHT, vertices[2].x * WIDTH, vertices[2].y * HEIGHT)
+    return boxes
+
+
+@pytest.mark.parametrize("with_paragraphs", [True, False], ids=["paragrafos", "so-tokens"])
+def test_overlap_tokens_kept_once_with_full_image_coordinates(with_paragraphs):
+    paragraphs = _grid()
+    tiles, documents, stitched = _stitch(paragraphs, with_paragraphs)
+
+    assert len(tiles) == 6
+    # As sobreposições fazem o Document AI devolver várias palavras em mais de um tile
+    assert sum(len(doc.pages[0].tokens) for doc in documents) > 600
+
+    words = _token_words(stitched)
+    assert len(words) == 600
+    assert len(set(words)) == 600
+    assert len(stitched.pages[0].paragraphs) == (600 if with_paragraphs else 0)
+
+    boxes = _token_boxes(stitched)
+    for [(word, box)] in paragraphs:
+        assert boxes[word] == pytest.approx(box, abs=0.01)
+
+
+def test_paragraph_crossing_tile_border_is_kept_whole():
+    # Fronteira entre os núcleos dos dois primeiros tiles em x: meio da sobreposição (1792..2048)
+    tiles = plan_tiles(WIDTH, HEIGHT)
+    border = tiles[0]["core"][2]
+    assert tiles[1]["box"][0] < border < tiles[0]["box"][2]
+
+    crossing = [("esquerda", (border - 110, 500, border - 10, 540)), ("direita", (border + 10, 500, border + 100, 540))]
+    _, documents, stitched = _stitch([crossing])
+
+    # Os dois tiles veem o parágrafo inteiro; só o dono do centro o mantém
+    assert all(len(doc.pages[0].paragraphs) == 1 for doc in documents[:2])
+    assert stitched.text == "esquerda direita\n"
+    assert len(stitched.pages[0].paragraphs) == 1
+    assert _token_words(stitched) == ["esquerda", "direita"]
+    boxes = _token_boxes(stitched)
+    for word, box in crossing:
+        assert boxes[word] == pytest.approx(box, abs=0.01)
+
+
+def test_paragraph_wider_than_overlap_is_merged_without_duplicates():
+    # 10 palavras de x=1450 a 2450: nenhum dos dois primeiros tiles vê o parágrafo inteiro
+    tiles = plan_tiles(WIDTH, HEIGHT)
+    line = [(f"w{i}", (1450 + i * 100, 500, 1540 + i * 100, 540)) for i in range(10)]
+    second_line = [(f"v{i}", (1450 + i * 100, 560, 1540 + i * 100, 600)) for i in range(10)]
+    _, documents, stitched = _stitch([line + second_line])
+
+    assert all(len(doc.pages[0].paragraphs) == 1 for doc in documents[:2])
+    assert line[-1][1][2] - line[0][1][0] > tiles[0]["box"][2] - tiles[1]["box"][0]
+    assert stitched.text == " ".join(w for w, _ in line) + "\n" + " ".join(w for w, _ in second_line) + "\n"
+    assert len(stitched.pages[0].paragraphs) == 1
+    assert len(stitched.pages[0].lines) == 2
+    assert _token_words(stitched) == [w for w, _ in line + second_line]
+    boxes = _token_boxes(stitched)
+    for word, box in line + second_line:
+        assert boxes[word] == pytest.approx(box, abs=0.01)
+
+    segment = stitched.pages[0].paragraphs[0].layout.text_anchor.text_segments[0]
+    assert stitched.text[segment.start_index:segment.end_index] == stitched.text
+
+
+def test_tile_field_mask_drops_entities():
+    mask = tile_field_mask(["entities", "pages.tokens", "pages.lines"])
+    assert "entities" not in mask
+    assert set(REQUIRED_FIELDS) <= set(mask)
+    assert "pages.lines" in mask
+    assert tile_field_mask(None) == REQUIRED_FIELDS
@@ -0,0 +1,44 @@
+"""Estado do daemon: reserva atômica por SHA-256."""
+import threading
+
+from watch_folder import StateStore
+
+
+def _claim_concurrently(stores, sha256):
+    barrier = threading.Barrier(len(stores))
+    results = [None] * len(stores)
+
+    def claim(i):
+        barrier.wait()
+        results[i] = stores[i].claim(sha256, f"copia-{i}.png")
+
+    threads = [threading.Thread(target=claim, args=(i,)) for i in range(len(stores))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_claim_is_exclusive_across_connections(tmp_path):
+    # Duas conexões (como dois workers/processos) disputando o mesmo conteúdo
+    path = str(tmp_path / ".watch_state.db")
+    stores = [StateStore(path), StateStore(path)]
+    for n in range(50):
+        results = _claim_concurrently(stores, f"sha-{n}")
+        assert results.count(None) == 1
+        assert results.count("processing") == 1
+
+
+def test_claim_after_failure_done_and_restart(tmp_path):
+    path = str(tmp_path / ".watch_state.db")
+    store = StateStore(path)
+    assert store.claim("a", "a.png") is None
+    store.mark("a", "a.png", "failed", error="boom")
+    assert store.claim("a", "a.png") is None  # falha anterior pode ser reprocessada
+    store.mark("a", "a.png", "done")
+    assert store.claim("a", "b.png") == "done"
+
+    assert store.claim("b", "b.png") is None
+    # Reinício com "processing" pendente: volta a poder ser reservado
+    assert StateStore(path).claim("b", "b.png") is None
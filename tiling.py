@@ -0,0 +1,307 @@
+"""
+OCR em blocos (tiles) para imagens grandes demais para uma única requisição.
+
+A imagem é dividida em tiles sobrepostos, processados em paralelo, e os
+resultados são costurados num único Document:
+- coordenadas dos tiles são convertidas para normalized_vertices da imagem inteira
+- cada tile é "dono" de uma região central (as sobreposições são divididas ao meio);
+  a posse é por token: das cópias de um token vistas por tiles vizinhos fica só a do
+  tile cujo núcleo contém o seu centro, o que remove as duplicatas das sobreposições
+- parágrafos cortados na borda (cada tile devolve um pedaço) são unidos pelos tokens
+  que compartilham; texto, linhas e text_anchors são reconstruídos com os tokens mantidos
+- entities não são costuradas: tile_field_mask() as tira das requisições por tile
+
+O Document resultante é consumido sem mudanças por draw_bounding_boxes e
+extract_text_by_paragraphs.
+"""
+import bisect
+import io
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+from google.cloud import documentai_v1 as documentai
+
+TILE_SIZE = 2048
+TILE_OVERLAP = 256
+MAX_SIDE = 4096  # acima disso (ou de MAX_PIXELS) a imagem é processada em tiles
+MAX_PIXELS = 16_000_000
+MAX_BYTES = 20 * 1024 * 1024
+
+# Campos exigidos pela costura (posse por token; parágrafos ou blocos para agrupar)
+REQUIRED_FIELDS = ["text", "pages.dimension", "pages.tokens", "pages.paragraphs", "pages.blocks"]
+# Campos presentes no Document costurado (registrado como field mask no índice de hashes)
+STITCHED_FIELDS = ["text", "pages.page_number", "pages.dimension", "pages.tokens", "pages.lines", "pages.paragraphs"]
+
+
+def tile_field_mask(field_mask: list[str] | None) -> list[str]:
+    """Field mask das requisições por tile: campos da costura + os pedidos, sem entities (não costuradas)."""
+    return [field for field in dict.fromkeys((field_mask or []) + REQUIRED_FIELDS) if field != "entities"]
+
+
+def needs_tiling(image: Image.Image, content_size: int = 0) -> bool:
+    width, height = image.size
+    return max(width, height) > MAX_SIDE or width * height > MAX_PIXELS or content_size > MAX_BYTES
+
+
+def _axis_tiles(length: int, tile_size: int, overlap: int) -> list[tuple[int, int]]:
+    if length <= tile_size:
+        return [(0, length)]
+    step = tile_size - overlap
+    count = math.ceil((length - overlap) / step)
+    spans = [(i * step, i * step + tile_size) for i in range(count - 1)]
+    spans.append((length - tile_size, length))  # último tile encostado na borda
+    return spans
+
+
+def _axis_cores(spans: list[tuple[int, int]], length: int) -> list[tuple[float, float]]:
+    # Fronteira entre tiles vizinhos = meio da sobreposição; os núcleos particionam o eixo
+    bounds = [0.0] + [(spans[i][1] + spans[i + 1][0]) / 2 for i in range(len(spans) - 1)] + [float(length)]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(spans))]
+
+
+def plan_tiles(width: int, height: int, tile_size: int = TILE_SIZE, overlap: int = TILE_OVERLAP) -> list[dict]:
+    """Tiles em ordem de leitura (linha a linha), com caixa e núcleo em pixels da imagem inteira."""
+    x_spans, y_spans = _axis_tiles(width, tile_size, overlap), _axis_tiles(height, tile_size, overlap)
+    x_cores, y_cores = _axis_cores(x_spans, width), _axis_cores(y_spans, height)
+    tiles = []
+    for (y0, y1), (cy0, cy1) in zip(y_spans, y_cores):
+        for (x0, x1), (cx0, cx1) in zip(x_spans, x_cores):
+            tiles.append({"box": (x0, y0, x1, y1), "core": (cx0, cy0, cx1, cy1)})
+    return tiles
+
+
+def _encode_tile(image: Image.Image, box: tuple[int, int, int, int]) -> bytes:
+    buffer = io.BytesIO()
+    tile = image.crop(box)
+    if tile.mode not in ("RGB", "L"):
+        tile = tile.convert("RGB")
+    tile.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _to_full_image(layout, tile: dict, page_size: tuple[float, float], full_size: tuple[int, int]):
+    """Vértices do tile → pixels da imagem inteira (lista de (x, y))."""
+    x0, y0, x1, y1 = tile["box"]
+    tile_w, tile_h = x1 - x0, y1 - y0
+    bpoly = getattr(layout, "bounding_poly", None)
+    if not bpoly:
+        return []
+    if bpoly.normalized_vertices:
+        return [(x0 + v.x * tile_w, y0 + v.y * tile_h) for v in bpoly.normalized_vertices]
+    # Vértices absolutos: escala pela dimensão que o Document AI reportou para o tile
+    page_w, page_h = page_size
+    sx = tile_w / page_w if page_w else 1.0
+    sy = tile_h / page_h if page_h else 1.0
+    return [(x0 + v.x * sx, y0 + v.y * sy) for v in bpoly.vertices]
+
+
+def _span(layout) -> tuple[int, int] | None:
+    segments = getattr(getattr(layout, "text_anchor", None), "text_segments", None)
+    if not segments:
+        return None
+    return int(segments[0].start_index or 0), int(segments[-1].end_index or 0)
+
+
+def _box(points) -> tuple[float, float, float, float]:
+    xs, ys = [x for x, _ in points], [y for _, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _iou(a, b) -> float:
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def _layout(start: int, end: int, box, confidence: float, full_size):
+    width, height = full_size
+    x0, y0, x1, y1 = box
+    return documentai.Document.Page.Layout(
+        text_anchor=documentai.Document.TextAnchor(
+            text_segments=[documentai.Document.TextAnchor.TextSegment(start_index=start, end_index=end)]
+        ),
+        confidence=confidence,
+        bounding_poly=documentai.BoundingPoly(normalized_vertices=[
+            documentai.NormalizedVertex(x=x / width, y=y / height)
+            for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))
+        ]),
+    )
+
+
+class _Sets:
+    """Union-find mínimo (tokens repetidos entre tiles; parágrafos parciais do mesmo parágrafo)."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, key):
+        self.parent.setdefault(key, key)
+        while self.parent[key] != key:
+            self.parent[key] = self.parent[self.parent[key]]
+            key = self.parent[key]
+        return key
+
+    def union(self, a, b) -> None:
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)  # raiz = primeiro em ordem de leitura
+
+
+def _collect_tokens(tiles: list[dict], documents: list, full_size) -> tuple[list[dict], dict]:
+    """Tokens de todos os tiles em pixels da imagem inteira, com o parágrafo (ou bloco) do tile a que pertencem."""
+    tokens, group_confidence = [], {}
+    for t, (tile, doc) in enumerate(zip(tiles, documents)):
+        if not doc.pages:
+            continue
+        page = doc.pages[0]
+        page_size = (page.dimension.width, page.dimension.height)
+        tile_text = doc.text or ""
+
+        units = list(page.paragraphs) or list(page.blocks)
+        spans = sorted(
+            (span[0], span[1], u) for u, unit in enumerate(units) if (span := _span(unit.layout)) is not None
+        )
+        starts = [start for start, _, _ in spans]
+        for _, _, u in spans:
+            group_confidence[(t, u)] = units[u].layout.confidence
+
+        for token in page.tokens:
+            span = _span(token.layout)
+            points = _to_full_image(token.layout, tile, page_size, full_size)
+            word = tile_text[span[0]:span[1]].strip() if span else ""
+            if not word or not points:
+                continue
+            i = bisect.bisect_right(starts, span[0]) - 1
+            box = _box(points)
+            tokens.append({
+                "tile": t,
+                "text": word,
+                "box": box,
+                "center": ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2),
+                "confidence": token.layout.confidence,
+                "group": (t, spans[i][2]) if i >= 0 and span[0] < spans[i][1] else None,
+            })
+    return tokens, group_confidence
+
+
+def _core_depth(token: dict, tile: dict) -> float:
+    """Distância do centro do token à borda do núcleo do tile (negativa se fora)."""
+    cx0, cy0, cx1, cy1 = tile["core"]
+    x, y = token["center"]
+    return min(x - cx0, cx1 - x, y - cy0, cy1 - y)
+
+
+def _lines(members: list[dict]) -> list[list[dict]]:
+    """Agrupa tokens em linhas pela altura do centro; cada linha em ordem de x."""
+    heights = sorted(tok["box"][3] - tok["box"][1] for tok in members)
+    tolerance = heights[len(heights) // 2] / 2
+    lines, current, line_y = [], [], None
+    for tok in sorted(members, key=lambda tok: tok["center"][1]):
+        if current and tok["center"][1] - line_y > tolerance:
+            lines.append(current)
+            current = []
+        current.append(tok)
+        line_y = sum(m["center"][1] for m in current) / len(current)
+    if current:
+        lines.append(current)
+    return [sorted(line, key=lambda tok: tok["center"][0]) for line in lines]
+
+
+def _union_box(members: list[dict]) -> tuple[float, float, float, float]:
+    return (min(m["box"][0] for m in members), min(m["box"][1] for m in members),
+            max(m["box"][2] for m in members), max(m["box"][3] for m in members))
+
+
+def stitch_documents(tiles: list[dict], documents: list, full_size: tuple[int, int]):
+    """Costura os Documents dos tiles num único Document de uma página."""
+    tokens, group_confidence = _collect_tokens(tiles, documents, full_size)
+
+    # O mesmo token visto por tiles vizinhos (mesmo texto, caixas sobrepostas) vira um conjunto;
+    # os parágrafos parciais que compartilham tokens são o mesmo parágrafo
+    same_token, same_group = _Sets(), _Sets()
+    cells = {}
+    for i, tok in enumerate(tokens):
+        gx, gy = int(tok["center"][0] // 32), int(tok["center"][1] // 32)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((tok["text"], gx + dx, gy + dy), ()):
+                    other = tokens[j]
+                    if other["tile"] != tok["tile"] and _iou(other["box"], tok["box"]) > 0.5:
+                        same_token.union(i, j)
+                        if other["group"] is not None and tok["group"] is not None:
+                            same_group.union(other["group"], tok["group"])
+        cells.setdefault((tok["text"], gx, gy), []).append(i)
+
+    # Posse por token: fica a cópia cujo centro está mais dentro do núcleo do seu tile;
+    # um token visto por um só tile fica se o centro está no núcleo dele
+    copies = {}
+    for i in range(len(tokens)):
+        copies.setdefault(same_token.find(i), []).append(i)
+    collections, loose = {}, []
+    for members in copies.values():
+        best = max(members, key=lambda i: _core_depth(tokens[i], tiles[tokens[i]["tile"]]))
+        if len(members) == 1 and _core_depth(tokens[best], tiles[tokens[best]["tile"]]) < 0:
+            continue  # pertence ao tile vizinho (cortado na borda deste)
+        tok = tokens[best]
+        if tok["group"] is None:
+            loose.append(tok)
+        else:
+            collections.setdefault(same_group.find(tok["group"]), []).append(tok)
+
+    # Texto e text_anchors reconstruídos só com os tokens mantidos, em ordem de leitura dos tiles
+    text_parts, text_length = [], 0
+    out_tokens, out_lines, out_paragraphs = [], [], []
+    ordered = [(collections[root], root) for root in sorted(collections)]
+    if loose:
+        ordered.append((loose, None))  # tokens fora de parágrafos: só linhas
+    for members, root in ordered:
+        paragraph_start = text_length
+        for line in _lines(members):
+            line_start = text_length
+            for k, tok in enumerate(line):
+                start = text_length
+                chunk = tok["text"] + ("\n" if k == len(line) - 1 else " ")
+                text_parts.append(chunk)
+                text_length += len(chunk)
+                out_tokens.append(documentai.Document.Page.Token(
+                    layout=_layout(start, start + len(tok["text"]), tok["box"], tok["confidence"], full_size)
+                ))
+            confidence = sum(tok["confidence"] for tok in line) / len(line)
+            out_lines.append(documentai.Document.Page.Line(
+                layout=_layout(line_start, text_length, _union_box(line), confidence, full_size)
+            ))
+        if root is not None:
+            out_paragraphs.append(documentai.Document.Page.Paragraph(
+                layout=_layout(paragraph_start, text_length, _union_box(members), group_confidence[root], full_size)
+            ))
+
+    width, height = full_size
+    page = documentai.Document.Page(
+        page_number=1,
+        dimension=documentai.Document.Page.Dimension(width=width, height=height, unit="pixels"),
+        tokens=out_tokens,
+        lines=out_lines,
+        paragraphs=out_paragraphs,
+    )
+    return documentai.Document(text="".join(text_parts), pages=[page])
+
+
+def process_tiled(image: Image.Image, process_fn, tile_size: int = TILE_SIZE, overlap: int = TILE_OVERLAP,
+                  max_workers: int = 4):
+    """
+    Processa a imagem em tiles concorrentes e retorna (Document costurado, número de tiles).
+    - process_fn(content: bytes, mime_type: str) -> Document (ex.: process_document com rate limiter)
+    """
+    tiles = plan_tiles(image.width, image.height, tile_size, overlap)
+    image.load()  # decodifica uma vez antes dos crops concorrentes
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(lambda box: process_fn(_encode_tile(image, box), "image/png"), tile["box"])
+            for tile in tiles
+        ]
+        documents = [future.result() for future in futures]
+    return stitch_documents(tiles, documents, image.size), len(tiles)
@@ -0,0 +1,82 @@
+"""
+Contador de uso mensal persistido em JSON (compartilhado entre o app e o daemon).
+
+O arquivo é regravado de forma atômica (tmp + os.replace); record_usage faz o
+read-modify-write sob um lock de arquivo para que processos concorrentes não
+percam incrementos.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, UTC
+
+from event_log import log_event
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas o lock entre threads
+    fcntl = None
+
+_thread_lock = threading.Lock()
+
+
+def current_month_key() -> str:
+    return datetime.now(UTC).strftime("%Y-%m")
+
+
+@contextmanager
+def _locked(path: str):
+    with _thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_usage_state(path: str) -> dict:
+    now_month = current_month_key()
+    state = {"month": now_month, "used": 0}
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = json.load(f) or {}
+                state["month"] = loaded.get("month", now_month)
+                state["used"] = int(loaded.get("used", 0))
+    except Exception as e:
+        log_event("usage_state_load_failed", level="error", path=path, error=str(e))
+
+    if state["month"] != now_month:
+        state = {"month": now_month, "used": 0}
+        save_usage_state(path, state)
+    return state
+
+
+def save_usage_state(path: str, state: dict) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        log_event("usage_state_save_failed", level="error", path=path, error=str(e))
+
+
+def can_process(path: str, limit: int, units: int = 1) -> tuple[bool, int, dict]:
+    state = load_usage_state(path)
+    remaining = max(0, limit - state["used"])
+    allowed = units <= remaining
+    return allowed, remaining, state
+
+
+def record_usage(path: str, units: int = 1) -> dict:
+    with _locked(path):
+        state = load_usage_state(path)
+        state["used"] = int(state["used"]) + int(units)
+        save_usage_state(path, state)
+    return state
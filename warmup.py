@@ -0,0 +1,123 @@
+"""
+Warm-up do servidor: remove a latência do primeiro processamento após um deploy.
+
+Roda uma vez por processo, numa thread em background, uma lista de etapas
+(credenciais, canal gRPC/TLS do Document AI, caches...). O estado é exposto:
+- em memória (status()), para a sidebar do app
+- num arquivo JSON (status_path), para health checks externos:
+
+    python warmup.py --check .warmup_status.json   # exit 0 se pronto (e o processo vivo), 1 caso contrário
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from event_log import log_event
+
+
+class Warmup:
+    """
+    Executa etapas (nome, função, obrigatória?) em ordem numa thread daemon.
+    Pronto = todas as etapas obrigatórias concluídas; falhas em etapas opcionais só são reportadas.
+    """
+
+    def __init__(self, steps: list[tuple[str, callable, bool]], status_path: str | None = None):
+        self.steps = steps
+        self.status_path = status_path
+        self._lock = threading.Lock()
+        self._status = {
+            "state": "pending",
+            "ready": False,
+            "pid": os.getpid(),
+            "started_at": None,
+            "finished_at": None,
+            "steps": {name: {"status": "pending", "required": required} for name, _, required in steps},
+        }
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+
+    def start(self) -> "Warmup":
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float | None = None) -> bool:
+        self._thread.join(timeout)
+        return self.status()["ready"]
+
+    def status(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self._status))
+
+    def _update(self, **fields) -> None:
+        with self._lock:
+            self._status.update(fields)
+            snapshot = json.dumps(self._status, ensure_ascii=False, indent=2)
+        if self.status_path:
+            tmp_path = f"{self.status_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.status_path)
+            except OSError as e:
+                log_event("warmup_status_write_failed", level="warning", path=self.status_path, error=str(e))
+
+    def _set_step(self, name: str, **fields) -> None:
+        with self._lock:
+            self._status["steps"][name].update(fields)
+        self._update()
+
+    def _run(self) -> None:
+        self._update(state="running", started_at=time.time())
+        required_ok = True
+        for name, fn, required in self.steps:
+            self._set_step(name, status="running")
+            start = time.perf_counter()
+            try:
+                fn()
+                duration = time.perf_counter() - start
+                self._set_step(name, status="ok", duration_s=round(duration, 3))
+                log_event("warmup_step", step=name, status="ok", duration_s=round(duration, 3))
+            except Exception as e:
+                duration = time.perf_counter() - start
+                self._set_step(name, status="failed", duration_s=round(duration, 3), error=str(e))
+                log_event("warmup_step", level="warning", step=name, status="failed",
+                          duration_s=round(duration, 3), error=str(e), required=required)
+                if required:
+                    required_ok = False
+                    break  # etapas seguintes dependem das obrigatórias
+
+        state = "ready" if required_ok else "failed"
+        self._update(state=state, ready=required_ok, finished_at=time.time())
+        log_event("warmup_finished", level="info" if required_ok else "error", state=state)
+
+
+def check(status_path: str) -> bool:
+    """Health check: arquivo de status reporta pronto e o processo que o gravou ainda está vivo."""
+    try:
+        with open(status_path, "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+    try:
+        pid = int(status.get("pid", 0))
+        if pid <= 0:
+            return False
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return False  # status de um processo anterior (ex.: antes do restart)
+    return bool(status.get("ready"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Health check do warm-up do Visualizer OCR")
+    parser.add_argument("--check", default=".warmup_status.json", help="Arquivo de status gravado pelo app")
+    args = parser.parse_args()
+    ready = check(args.check)
+    print("ready" if ready else "not ready")
+    sys.exit(0 if ready else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,581 @@
+"""
+Daemon de ingestão por pasta monitorada (alternativa ao upload manual no app).
+
+Uso:
+    python watch_folder.py --root /srv/scanner [--workers 2] [--queue-size 8] [--poll]
+
+Layout da pasta:
+    <root>/inbox              scanners gravam JPG/PNG/PDF aqui
+    <root>/done               originais processados + <arquivo>.json (Document) + <arquivo>.txt
+                              (+ <arquivo>.annotated.png com --annotate)
+    <root>/failed             originais com erro + <arquivo>.error.txt
+    <root>/.watch_state.db    arquivos já processados (por SHA-256), sobrevive a reinícios
+    <root>/.watch_stats.json  profundidade da fila e throughput, atualizado periodicamente
+
+Configuração lida do mesmo .streamlit/secrets.toml do app (seções [app] e [google]).
+Com --docai-mode record/replay, as respostas são gravadas/servidas de um cassete
+(docai_cassette.py) — replay roda offline, sem credenciais e sem consumir cota.
+A cota mensal (.usage_state.json) e o rate limiter (rate_limit_db) são compartilhados
+com o app, então o daemon recua quando a API ou a cota estão saturadas.
+
+O pós-processamento (texto, JSON, PNG anotado) roda num pool de processos
+(postprocess.py, um worker por núcleo por padrão), fora do GIL das threads de OCR.
+As threads de OCR não esperam o resultado: entregam o Document ao pool (até um por
+processo em andamento) e seguem; a conclusão marca "done" e move o original.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import queue
+import select
+import shutil
+import signal
+import sqlite3
+import struct
+import threading
+import time
+import tomllib
+from collections import deque
+
+from google.api_core.exceptions import ResourceExhausted
+
+import usage_store
+from event_log import configure as configure_event_log, log_event
+from docai_cassette import DEFAULT_CASSETTE_DIR, MODES as DOCAI_MODES, open_client
+from ocr_pipeline import (
+    create_client,
+    create_emulator_client,
+    get_mime_type,
+    process_document,
+    processor_name,
+    units_for,
+)
+from postprocess import PostProcessor
+from rate_limiter import RateLimiter, RateLimitTimeout, MemoryBackend, SQLiteBackend
+
+SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".pdf"}
+DEFER_COOLDOWN = 30.0  # s até reexaminar uma cópia idêntica de arquivo em andamento
+
+
+def load_secrets(path: str) -> dict:
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def load_credentials_info(google: dict) -> dict:
+    """Arquivo local da SA (application_credentials_path) → service_account_json do TOML."""
+    json_path = google.get("application_credentials_path", "")
+    if json_path and os.path.exists(json_path):
+        with open(json_path, "r") as f:
+            credentials_info = json.load(f)
+    else:
+        credentials_info = json.loads(google["service_account_json"])
+
+    if credentials_info.get("project_id") != google["project_id_string"]:
+        raise ValueError(f"❌ Mismatch project_id! Esperado: '{google['project_id_string']}'.")
+    return credentials_info
+
+
+class InotifyWatcher:
+    """Eventos IN_CLOSE_WRITE/IN_MOVED_TO via inotify (Linux), sem dependências externas."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch falhou em {directory}")
+
+    def poll(self, timeout: float) -> tuple[list[str], bool]:
+        """Retorna (nomes de arquivos completos, overflow?)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        names, overflow, offset = [], False, 0
+        while offset + self._EVENT.size <= len(data):
+            _, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                overflow = True
+            elif name:
+                names.append(name)
+        return names, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback por varredura: arquivo só é entregue quando tamanho/mtime ficam estáveis entre duas varreduras."""
+
+    def __init__(self, directory: str, interval: float = 2.0):
+        self.directory = directory
+        self.interval = interval
+        self._last = {}
+
+    def poll(self, timeout: float) -> tuple[list[str], bool]:
+        time.sleep(min(timeout, self.interval))
+        current = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    current[entry.name] = (st.st_size, st.st_mtime_ns)
+        stable = [name for name, sig in current.items() if self._last.get(name) == sig]
+        self._last = current
+        return stable, False
+
+    def close(self) -> None:
+        pass
+
+
+class StateStore:
+    """Estado persistente por SHA-256 do conteúdo (evita reprocessar após reinício)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "sha256 TEXT PRIMARY KEY, name TEXT, status TEXT, units INTEGER, error TEXT, updated_at REAL)"
+        )
+        # "processing" deixado por uma execução anterior (queda/parada) pode ser retomado
+        self._conn.execute("UPDATE files SET status = 'interrupted' WHERE status = 'processing'")
+        self._conn.commit()
+
+    def claim(self, sha256: str, name: str) -> str | None:
+        """
+        Marca o conteúdo como "processing" se ninguém o processou/está processando.
+        Retorna None se esta chamada ficou com o arquivo, senão o status atual
+        ("done" ou "processing") — dois arquivos idênticos não são cobrados duas vezes.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO files (sha256, name, status, units, error, updated_at) VALUES (?, ?, 'processing', 0, '', ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET name = excluded.name, status = excluded.status, "
+                "units = 0, error = '', updated_at = excluded.updated_at "
+                "WHERE files.status NOT IN ('done', 'processing')",
+                (sha256, name, time.time()),
+            )
+            self._conn.commit()
+            if cursor.rowcount:
+                return None
+            row = self._conn.execute("SELECT status FROM files WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0]
+
+    def status(self, sha256: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM files WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def mark(self, sha256: str, name: str, status: str, units: int = 0, error: str = "") -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO files (sha256, name, status, units, error, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET name = excluded.name, status = excluded.status, "
+                "units = excluded.units, error = excluded.error, updated_at = excluded.updated_at",
+                (sha256, name, status, units, error, time.time()),
+            )
+            self._conn.commit()
+
+
+class WatchFolderDaemon:
+    def __init__(self, root: str, secrets: dict, workers: int = 2, queue_size: int = 8,
+                 use_polling: bool = False, usage_state_path: str = ".usage_state.json",
+                 rescan_interval: float = 60.0, stats_interval: float = 30.0,
+                 postprocess_workers: int | None = None, annotate: bool = False, log_path: str | None = None,
+                 docai_mode: str | None = None, cassette_dir: str | None = None, replay_latency: bool | None = None):
+        self.root = root
+        self.inbox = os.path.join(root, "inbox")
+        self.done_dir = os.path.join(root, "done")
+        self.failed_dir = os.path.join(root, "failed")
+        for directory in (self.inbox, self.done_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        app = secrets["app"]
+        google = secrets["google"]
+        self.usage_limit = app["usage_limit"]
+        self.usage_state_path = usage_state_path
+        self.location = google["location"]
+        self.name = processor_name(google["project_id_numeric"], self.location, google["processor_id"])
+        # Modo do client (live/record/replay): argumentos têm prioridade sobre o secrets.toml
+        self.docai_mode = docai_mode or google.get("docai_mode", "live")
+        emulator_endpoint = google.get("emulator_endpoint", "")
+
+        def live_client():
+            if emulator_endpoint:
+                return create_emulator_client(emulator_endpoint)
+            return create_client(load_credentials_info(google), self.location)
+
+        self.client = open_client(
+            self.docai_mode,
+            live_client,
+            cassette_dir or google.get("cassette_dir", DEFAULT_CASSETTE_DIR),
+            simulate_latency=google.get("replay_latency", False) if replay_latency is None else replay_latency,
+        )
+
+        rate_limit_db = google.get("rate_limit_db", "")
+        self.rate_limiter = RateLimiter(
+            rate_per_minute=google.get("requests_per_minute", 120),
+            burst=google.get("requests_burst", 5),
+            backend=SQLiteBackend(rate_limit_db) if rate_limit_db else MemoryBackend(),
+        )
+
+        self.state = StateStore(os.path.join(root, ".watch_state.db"))
+        self.annotate = annotate
+        self.postprocessor = PostProcessor(max_workers=postprocess_workers, log_path=log_path)
+        # Documentos entregues ao pool e ainda não concluídos: no máximo um por processo
+        # (os workers de OCR esperam uma vaga — backpressure até a fila e o inbox)
+        self._postprocess_slots = threading.Semaphore(self.postprocessor.max_workers)
+        self.use_polling = use_polling
+        self.num_workers = workers
+        self.rescan_interval = rescan_interval
+        self.stats_interval = stats_interval
+
+        # Fila limitada: quando cheia, o watcher bloqueia (backpressure) e o resto fica no inbox
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self._pending = set()
+        self._deferred = {}  # nome → instante em que foi adiado (cópia idêntica em andamento)
+        self._pending_lock = threading.Lock()
+        self._completed = deque()
+        self._stats_lock = threading.Lock()
+        self.stats = {"processed": 0, "failed": 0, "skipped_duplicates": 0, "backoffs": 0, "quota_paused": False,
+                      "postprocessing": 0}
+        self._started_at = time.time()
+
+    # --------------------------------------------
+    # Entrada: watcher → fila limitada
+    # --------------------------------------------
+    def _make_watcher(self):
+        if not self.use_polling:
+            try:
+                return InotifyWatcher(self.inbox)
+            except (OSError, AttributeError) as e:
+                log_event("watch_inotify_unavailable", level="warning", error=str(e))
+        return PollingWatcher(self.inbox)
+
+    def _enqueue(self, name: str) -> None:
+        if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+            return
+        path = os.path.join(self.inbox, name)
+        with self._pending_lock:
+            if name in self._pending or not os.path.isfile(path):
+                return
+            if time.time() - self._deferred.get(name, 0.0) < DEFER_COOLDOWN:
+                return  # varreduras (--poll: a cada 2 s) não releem/re-hasheiam a cópia adiada
+            self._deferred.pop(name, None)
+            self._pending.add(name)
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(name, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+        with self._pending_lock:
+            self._pending.discard(name)
+
+    def _rescan(self) -> None:
+        for name in sorted(os.listdir(self.inbox)):
+            if self.stop_event.is_set():
+                return
+            self._enqueue(name)
+
+    def _watch_loop(self) -> None:
+        watcher = self._make_watcher()
+        print(f"👀 Monitorando {self.inbox} ({type(watcher).__name__})")
+        self._rescan()  # arquivos que chegaram com o daemon parado
+        last_rescan = time.time()
+        try:
+            while not self.stop_event.is_set():
+                names, overflow = watcher.poll(timeout=1.0)
+                for name in names:
+                    self._enqueue(name)
+                if overflow or time.time() - last_rescan >= self.rescan_interval:
+                    self._rescan()
+                    last_rescan = time.time()
+        finally:
+            watcher.close()
+
+    # --------------------------------------------
+    # Processamento: workers consomem a fila
+    # --------------------------------------------
+    def _destination(self, directory: str, name: str, suffix: str) -> str:
+        dst = os.path.join(directory, name)
+        if os.path.exists(dst):
+            stem, ext = os.path.splitext(name)
+            dst = os.path.join(directory, f"{stem}-{suffix}{ext}")
+        return dst
+
+    def _wait_for_quota(self, units: int = 1) -> bool:
+        """Bloqueia enquanto a cota mensal estiver esgotada; retorna False se o daemon parar."""
+        if self.docai_mode == "replay":
+            return not self.stop_event.is_set()  # respostas gravadas não consomem cota
+        while not self.stop_event.is_set():
+            allowed, _, _ = usage_store.can_process(self.usage_state_path, self.usage_limit, units)
+            with self._stats_lock:
+                self.stats["quota_paused"] = not allowed
+            if allowed:
+                return True
+            self.stop_event.wait(60.0)
+        return False
+
+    def _process_with_backoff(self, content: bytes, mime_type: str):
+        delay = 5.0
+        while not self.stop_event.is_set():
+            try:
+                rate_limiter = None if self.docai_mode == "replay" else self.rate_limiter
+                return process_document(self.client, self.name, content, mime_type, rate_limiter=rate_limiter)
+            except (ResourceExhausted, RateLimitTimeout) as e:
+                with self._stats_lock:
+                    self.stats["backoffs"] += 1
+                log_event("watch_backoff", level="warning", delay_s=delay, error=str(e))
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, 300.0)
+        return None
+
+    def _skip_duplicate(self, path: str, name: str, sha256: str) -> None:
+        # Já processado (cópia idêntica, ou reinício entre a gravação do resultado e a movimentação)
+        shutil.move(path, self._destination(self.done_dir, name, sha256[:8]))
+        with self._stats_lock:
+            self.stats["skipped_duplicates"] += 1
+
+    def _handle(self, name: str) -> bool:
+        """Processa um arquivo do inbox. True se ele foi entregue ao pós-processamento (conclusão assíncrona)."""
+        path = os.path.join(self.inbox, name)
+        if not os.path.isfile(path):
+            return False
+        with open(path, "rb") as f:
+            content = f.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        if self.state.status(sha256) == "done":
+            self._skip_duplicate(path, name, sha256)
+            return False
+
+        if not self._wait_for_quota():
+            return False
+
+        # Reserva atômica: só um arquivo com o mesmo conteúdo chega ao Document AI
+        current = self.state.claim(sha256, name)
+        if current == "done":
+            self._skip_duplicate(path, name, sha256)
+            return False
+        if current == "processing":
+            # Cópia idêntica em andamento: fica no inbox e a próxima varredura a resolve
+            # (duplicata se a outra terminar, reprocessada se a outra falhar)
+            log_event("watch_duplicate_deferred", file_name=name, sha256=sha256)
+            with self._pending_lock:
+                self._deferred[name] = time.time()
+            return False
+
+        # Resultados usam o nome final do original como prefixo (a.jpg → a.jpg.json / a.jpg.txt)
+        done_path = self._destination(self.done_dir, name, sha256[:8])
+        try:
+            document = self._process_with_backoff(content, get_mime_type(os.path.splitext(name)[1]))
+            if document is None:
+                self.state.mark(sha256, name, "interrupted")
+                return False  # daemon parando; arquivo continua no inbox
+
+            units_used = 0 if self.docai_mode == "replay" else units_for(document)
+            if units_used:
+                usage_store.record_usage(self.usage_state_path, units_used)
+
+            # Texto, JSON e PNG anotado no pool de processos; o worker de OCR segue para o
+            # próximo arquivo e _finish() marca "done" e move o original na conclusão
+            self._postprocess_slots.acquire()
+            try:
+                future = self.postprocessor.submit(document, done_path, image_path=path, annotate=self.annotate)
+            except Exception:
+                self._postprocess_slots.release()
+                raise
+            with self._stats_lock:
+                self.stats["postprocessing"] += 1
+            future.add_done_callback(lambda f: self._finish(f, name, path, sha256, done_path, units_used))
+            return True
+
+        except Exception as e:
+            self._fail(name, path, sha256, e)
+            return False
+
+    def _finish(self, future, name: str, path: str, sha256: str, done_path: str, units_used: int) -> None:
+        """Conclusão do pós-processamento (thread do pool): resultados já gravados → "done" → move o original."""
+        try:
+            result = future.result()
+            self.state.mark(sha256, name, "done", units=units_used)
+            shutil.move(path, done_path)
+            with self._stats_lock:
+                self.stats["processed"] += 1
+                self._completed.append(time.time())
+            log_event("watch_file_done", file_name=name, sha256=sha256, units=units_used,
+                      postprocess_s=result["timings"], annotated=bool(result["annotated_path"]))
+        except Exception as e:
+            self._fail(name, path, sha256, e)
+        finally:
+            with self._stats_lock:
+                self.stats["postprocessing"] -= 1
+            self._postprocess_slots.release()
+            self._release(name)
+
+    def _fail(self, name: str, path: str, sha256: str, error: Exception) -> None:
+        log_event("watch_file_failed", level="error", file_name=name, sha256=sha256, error=str(error))
+        try:
+            self.state.mark(sha256, name, "failed", error=str(error))
+            failed_path = self._destination(self.failed_dir, name, sha256[:8])
+            with open(f"{failed_path}.error.txt", "w", encoding="utf-8") as f:
+                f.write(str(error))
+            shutil.move(path, failed_path)
+        except OSError as e:
+            log_event("watch_move_failed", level="error", file_name=name, error=str(e))
+        with self._stats_lock:
+            self.stats["failed"] += 1
+
+    def _release(self, name: str) -> None:
+        # Sai de _pending só ao final: varreduras não reenfileiram arquivo em andamento
+        with self._pending_lock:
+            self._pending.discard(name)
+
+    def _worker_loop(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                name = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            handed_off = False
+            try:
+                handed_off = self._handle(name)
+            except Exception as e:
+                # Falha fora do processamento (arquivo sumiu/renomeado, permissão, move para done/):
+                # registra e segue — o arquivo, se ainda existir, volta na próxima varredura
+                log_event("watch_file_failed", level="error", file_name=name, error=str(e))
+            finally:
+                if not handed_off:
+                    self._release(name)
+                self.queue.task_done()
+
+    # --------------------------------------------
+    # Métricas: profundidade da fila e throughput
+    # --------------------------------------------
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self._stats_lock:
+            while self._completed and now - self._completed[0] > 60.0:
+                self._completed.popleft()
+            snapshot = dict(self.stats)
+            snapshot["throughput_per_min"] = len(self._completed)
+        elapsed = max(now - self._started_at, 1e-9)
+        snapshot["throughput_avg_per_min"] = snapshot["processed"] * 60.0 / elapsed
+        snapshot["queue_depth"] = self.queue.qsize()
+        snapshot["queue_capacity"] = self.queue.maxsize
+        with self._pending_lock:
+            snapshot["in_flight"] = max(0, len(self._pending) - snapshot["queue_depth"])
+        snapshot["rate_limiter"] = self.rate_limiter.metrics()
+        snapshot["postprocess_workers"] = self.postprocessor.max_workers
+        snapshot["docai_mode"] = self.docai_mode
+        snapshot["updated_at"] = now
+        return snapshot
+
+    def _stats_loop(self) -> None:
+        stats_path = os.path.join(self.root, ".watch_stats.json")
+        while not self.stop_event.wait(self.stats_interval):
+            snapshot = self.snapshot()
+            log_event("watch_stats", **{k: v for k, v in snapshot.items() if k != "updated_at"})
+            print(
+                f"📊 Fila: {snapshot['queue_depth']}/{snapshot['queue_capacity']} | "
+                f"Em andamento: {snapshot['in_flight']} (pós-processamento: {snapshot['postprocessing']}) | "
+                f"Throughput: {snapshot['throughput_per_min']}/min | "
+                f"OK: {snapshot['processed']} | Falhas: {snapshot['failed']}"
+                f"{' | ⛔ Cota mensal esgotada' if snapshot['quota_paused'] else ''}"
+            )
+            tmp_path = stats_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, stats_path)
+
+    def run(self) -> None:
+        threads = [threading.Thread(target=self._watch_loop, name="watcher", daemon=True)]
+        threads += [
+            threading.Thread(target=self._worker_loop, name=f"worker-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        threads.append(threading.Thread(target=self._stats_loop, name="stats", daemon=True))
+        for t in threads:
+            t.start()
+        try:
+            while not self.stop_event.is_set():
+                self.stop_event.wait(1.0)
+        finally:
+            self.stop_event.set()
+            for t in threads:
+                t.join(timeout=130.0)  # deixa o arquivo em andamento terminar (timeout da API: 120s)
+            self.postprocessor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daemon de OCR por pasta monitorada (Document AI)")
+    parser.add_argument("--root", required=True, help="Pasta raiz com inbox/, done/ e failed/")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml", help="Mesmo secrets.toml do app")
+    parser.add_argument("--workers", type=int, default=2, help="Chamadas simultâneas ao Document AI")
+    parser.add_argument("--queue-size", type=int, default=8, help="Capacidade da fila de trabalho")
+    parser.add_argument("--poll", action="store_true", help="Força varredura periódica (ex.: compartilhamentos de rede)")
+    parser.add_argument("--usage-state", default=".usage_state.json", help="Arquivo de uso mensal compartilhado com o app")
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="Intervalo (s) do relatório de fila/throughput")
+    parser.add_argument("--postprocess-workers", type=int, default=None, help="Processos de pós-processamento (padrão: núcleos)")
+    parser.add_argument("--annotate", action="store_true", help="Grava <arquivo>.annotated.png com as bounding boxes")
+    parser.add_argument("--docai-mode", choices=DOCAI_MODES, default=None,
+                        help="live, record (grava respostas) ou replay (offline); padrão: docai_mode do secrets.toml")
+    parser.add_argument("--cassette-dir", default=None, help=f"Diretório das respostas gravadas (padrão: {DEFAULT_CASSETTE_DIR})")
+    parser.add_argument("--replay-latency", action="store_true", default=None, help="Em replay, simula a latência original")
+    parser.add_argument("--log-path", default=".logs/watch_folder.jsonl", help="Log estruturado (JSONL); workers do pós-processamento gravam em <stem>.worker-<n>.jsonl")
+    args = parser.parse_args()
+
+    configure_event_log(path=args.log_path, echo=True)
+
+    daemon = WatchFolderDaemon(
+        root=args.root,
+        secrets=load_secrets(args.secrets),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        use_polling=args.poll,
+        usage_state_path=args.usage_state,
+        stats_interval=args.stats_interval,
+        postprocess_workers=args.postprocess_workers,
+        annotate=args.annotate,
+        log_path=args.log_path,
+        docai_mode=args.docai_mode,
+        cassette_dir=args.cassette_dir,
+        replay_latency=args.replay_latency,
+    )
+
+    def _shutdown(signum, frame):
+        print("🛑 Encerrando (aguardando arquivos em andamento)...")
+        daemon.stop_event.set()
+
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()